@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Encode size and time: legacy DecimalEncoder JSON vs JSON / MessagePack / CBOR.
+
+Usage: python3 bench_binary_formats.py   (pip install msgpack cbor2 orjson)
+"""
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+import serialization  # noqa: E402
+from sample_orders import CUSTOMER_ID, make_page  # noqa: E402
+
+PAGE_SIZES = [50, 500, 1000]
+
+
+# The encoder the handlers used before src/shared/serialization.py
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def encoders():
+    yield 'legacy json', lambda page: json.dumps(page, cls=DecimalEncoder).encode()
+    for media_type in serialization.supported_media_types():
+        yield media_type.split('/')[1], lambda page, media_type=media_type: serialization.encode(page, media_type)
+
+
+def main():
+    print(f"{'items':>6} {'format':>12} {'KB':>8} {'encode ms':>10}")
+    for count in PAGE_SIZES:
+        page = {'customer_id': CUSTOMER_ID, 'data': make_page(count), 'count': count}
+        runs = max(5, 5000 // count)
+        for name, encode in encoders():
+            seconds = timeit.timeit(lambda: encode(page), number=runs) / runs
+            print(f"{count:>6} {name:>12} {len(encode(page)) / 1024:>8.1f} {seconds * 1000:>10.2f}")
+    missing = [name for name, module in (('msgpack', serialization.msgpack), ('cbor2', serialization.cbor2))
+               if module is None]
+    if missing:
+        print(f"(not installed: {', '.join(missing)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Row-per-object JSON vs format=columnar: size and encode/decode time.
+
+Usage: python3 bench_columnar.py
+"""
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'api'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+from columnar import decode_columnar, encode_columnar  # noqa: E402
+from sample_orders import CUSTOMER_ID, make_page  # noqa: E402
+from serialization import dumps_bytes  # noqa: E402
+
+PAGE_SIZES = [50, 500, 1000]
+
+
+def encode_rows(items):
+    return dumps_bytes({'customer_id': CUSTOMER_ID, 'data': items, 'count': len(items)})
+
+
+def encode_columns(items):
+    columns, rows, absent = encode_columnar(items)
+    return dumps_bytes({'customer_id': CUSTOMER_ID, 'format': 'columnar',
+                        'columns': columns, 'rows': rows, 'absent': absent, 'count': len(items)})
+
+
+def decode_rows(body):
+    return json.loads(body)['data']
+
+
+def decode_columns(body):
+    return decode_columnar(json.loads(body))
+
+
+def timed(func, arg, runs):
+    return timeit.timeit(lambda: func(arg), number=runs) / runs * 1000
+
+
+def main():
+    print(f"{'items':>6} {'format':>9} {'KB':>8} {'gzip KB':>8} {'encode ms':>10} {'decode ms':>10}")
+    for count in PAGE_SIZES:
+        items = make_page(count)
+        runs = max(5, 5000 // count)
+        for name, encode, decode in (('rows', encode_rows, decode_rows),
+                                     ('columnar', encode_columns, decode_columns)):
+            body = encode(items)
+            packed = gzip.compress(body, compresslevel=6, mtime=0)
+            print(f"{count:>6} {name:>9} {len(body) / 1024:>8.1f} {len(packed) / 1024:>8.1f} "
+                  f"{timed(encode, items, runs):>10.2f} {timed(decode, body, runs):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
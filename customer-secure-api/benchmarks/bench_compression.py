@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Compression ratio and CPU cost of GET /data response encodings.
+
+Usage: python3 bench_compression.py
+"""
+import gzip
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+import http_responses  # noqa: E402
+from serialization import dumps_bytes  # noqa: E402
+from sample_orders import CUSTOMER_ID, make_page  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAGE_SIZES = [50, 500, 1000]
+
+
+def encoders():
+    yield 'gzip-1', lambda data: gzip.compress(data, compresslevel=1, mtime=0)
+    yield f"gzip-{http_responses.GZIP_LEVEL}", lambda data: gzip.compress(data, compresslevel=http_responses.GZIP_LEVEL, mtime=0)
+    yield 'gzip-9', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli:
+        yield f"br-{http_responses.BROTLI_QUALITY}", lambda data: brotli.compress(data, quality=http_responses.BROTLI_QUALITY)
+        yield 'br-11', lambda data: brotli.compress(data, quality=11)
+
+
+def main():
+    print(f"{'items':>6} {'codec':>8} {'raw KB':>9} {'enc KB':>9} {'ratio':>7} {'ms':>8}")
+    for count in PAGE_SIZES:
+        body = dumps_bytes({
+            'customer_id': CUSTOMER_ID,
+            'data': make_page(count),
+            'count': count
+        })
+        for name, encode in encoders():
+            runs = 20
+            seconds = timeit.timeit(lambda: encode(body), number=runs) / runs
+            encoded = encode(body)
+            print(f"{count:>6} {name:>8} {len(body) / 1024:>9.1f} {len(encoded) / 1024:>9.1f} "
+                  f"{len(body) / len(encoded):>7.1f} {seconds * 1000:>8.2f}")
+    if not brotli:
+        print('(brotli not installed; pip install Brotli to include it)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""DynamoDB wire items to response JSON: legacy resource path vs fast path.
+
+Both paths start from the AttributeValue dicts the low-level client returns;
+the resource path is what boto3.resource('dynamodb') does on top of that.
+
+Usage: python3 bench_deserialize.py
+"""
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'api'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import app  # noqa: E402
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer  # noqa: E402
+from sample_orders import make_page  # noqa: E402
+from serialization import dumps  # noqa: E402
+
+PAGE_SIZES = [50, 500, 1000]
+
+
+# The encoder the handlers used before src/shared/serialization.py
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def resource_path(wire_items):
+    deserializer = TypeDeserializer()
+    items = [{name: deserializer.deserialize(value) for name, value in item.items()}
+             for item in wire_items]
+    return json.dumps({'data': items}, cls=DecimalEncoder)
+
+
+def fast_path(wire_items):
+    items = [app.deserialize_item(item) for item in wire_items]
+    return dumps({'data': items})
+
+
+def main():
+    serializer = TypeSerializer()
+    print(f"{'items':>6} {'resource ms':>12} {'fast ms':>9} {'speedup':>8}")
+    for count in PAGE_SIZES:
+        wire_items = [{name: serializer.serialize(value) for name, value in item.items()}
+                      for item in make_page(count)]
+        runs = max(5, 5000 // count)
+        baseline = timeit.timeit(lambda: resource_path(wire_items), number=runs) / runs
+        fast = timeit.timeit(lambda: fast_path(wire_items), number=runs) / runs
+        print(f"{count:>6} {baseline * 1000:>12.2f} {fast * 1000:>9.2f} {baseline / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
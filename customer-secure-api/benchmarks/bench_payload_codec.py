@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Stored item size and capacity units with PAYLOAD_CODEC off, gzip and zstd.
+
+Item sizes follow DynamoDB's billing rules (attribute name plus value,
+numbers at one byte per two significant digits plus one). Writes are
+billed per 1 KB of each item; a Query page is billed per 4 KB of the
+items it reads, at half price for eventually consistent reads.
+
+Usage: python3 bench_payload_codec.py
+"""
+import math
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+import payload_codec  # noqa: E402
+from sample_orders import make_page  # noqa: E402
+
+PAGE_SIZES = [50, 500, 1000]
+
+
+def attribute_size(value):
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, Decimal):
+        digits = value.normalize().as_tuple().digits
+        return math.ceil(len(digits) / 2) + 1
+    if hasattr(value, 'value'):
+        return len(value.value)
+    raise TypeError(f"Unsupported attribute type: {type(value).__name__}")
+
+
+def item_size(item):
+    return sum(len(name.encode()) + attribute_size(value) for name, value in item.items())
+
+
+def stored_items(count):
+    # As the writers store them today, with a content hash and version
+    return [dict(item, content_hash='0' * 32, version=Decimal(1)) for item in make_page(count)]
+
+
+def codecs():
+    yield 'plain', None
+    yield 'gzip', 'gzip'
+    if payload_codec.zstandard:
+        yield 'zstd', 'zstd'
+
+
+def main():
+    print(f"{'items':>6} {'codec':>6} {'avg B':>7} {'WCU/item':>9} {'RCU/page':>9} {'WCU -%':>7} {'RCU -%':>7} "
+          f"{'pack ms':>8}")
+    for count in PAGE_SIZES:
+        items = stored_items(count)
+        baseline = None
+        for name, codec in codecs():
+            packed = [payload_codec.pack_item(item, codec) if codec else item for item in items]
+            sizes = [item_size(item) for item in packed]
+            write_units = sum(math.ceil(size / 1024) for size in sizes) / count
+            read_units = math.ceil(sum(sizes) / 4096) / 2
+            if baseline is None:
+                baseline = write_units, read_units
+            runs = 10
+            seconds = timeit.timeit(
+                lambda: [payload_codec.pack_item(item, codec) for item in items], number=runs
+            ) / runs if codec else 0.0
+            print(f"{count:>6} {name:>6} {sum(sizes) / count:>7.0f} {write_units:>9.2f} {read_units:>9.1f} "
+                  f"{1 - write_units / baseline[0]:>7.0%} {1 - read_units / baseline[1]:>7.0%} "
+                  f"{seconds * 1000:>8.2f}")
+    if not payload_codec.zstandard:
+        print('(zstandard not installed; pip install zstandard to include it)')
+
+
+if __name__ == '__main__':
+    main()
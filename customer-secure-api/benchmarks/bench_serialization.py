@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Stdlib json + DecimalEncoder vs src/shared/serialization.py.
+
+Usage: python3 bench_serialization.py
+"""
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'shared'))
+
+import serialization  # noqa: E402
+from sample_orders import CUSTOMER_ID, make_page  # noqa: E402
+
+PAGE_SIZES = [50, 500, 5000]
+
+
+# The encoder the handlers used before src/shared/serialization.py
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def main():
+    backend = 'orjson' if serialization.orjson else 'stdlib fallback'
+    print(f"serialization.dumps backend: {backend}")
+    print(f"{'items':>6} {'stdlib ms':>10} {'shared ms':>10} {'speedup':>8}")
+    for count in PAGE_SIZES:
+        page = {'customer_id': CUSTOMER_ID, 'data': make_page(count), 'count': count}
+        runs = max(5, 5000 // count)
+        baseline = timeit.timeit(lambda: json.dumps(page, cls=DecimalEncoder), number=runs) / runs
+        shared = timeit.timeit(lambda: serialization.dumps(page), number=runs) / runs
+        print(f"{count:>6} {baseline * 1000:>10.2f} {shared * 1000:>10.2f} {baseline / shared:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
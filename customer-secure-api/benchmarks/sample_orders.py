@@ -0,0 +1,53 @@
+"""Synthetic order-line pages shaped like the Calyx spreadsheet export."""
+import random
+from decimal import Decimal
+
+CUSTOMER_ID = 'Calyx Containers'
+
+ITEM_DESCRIPTIONS = [
+    'AYR FL Kynd 3.5g bag White',
+    'Child Resistant Pouch 4x6 Matte Black',
+    'Pop Top 13 Dram Clear',
+    'Glass Jar 2oz w/ CR Lid Black',
+    'Pre-Roll Tube 116mm Opaque White',
+]
+
+
+def make_item(index, rng):
+    so_num = 104000 + index // 4
+    so_line = index % 4 + 1
+    ordered = rng.choice([5000, 25000, 100000, 315000])
+    received = rng.randint(0, ordered)
+    shipped = rng.randint(0, received)
+    return {
+        'customer_id': CUSTOMER_ID,
+        'data_id': f"{so_num}-{so_line}",
+        'Plant': rng.choice(['Gardena', 'Denver', 'Oakland']),
+        'JobCode': str(so_num),
+        'JobLine': str(so_line),
+        'CustPO': f"PO{rng.randint(1000, 9999)}",
+        'ItemGroup': rng.choice(['900-PCH', '910-JAR', '920-TUB']),
+        'ItemCode': str(rng.randint(100000, 119999)),
+        'ItemDesc': rng.choice(ITEM_DESCRIPTIONS),
+        'PlanAvailDate': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        'CustItemRef': f"AYWL-FL-{rng.randint(1000, 1999)}-KY30",
+        'Job Inv Qty': Decimal(0),
+        'Job Ord Qty': Decimal(ordered),
+        'Job Recd Qty': Decimal(received),
+        'SO Shipped Qty': Decimal(shipped),
+        'Job Outst Qty': Decimal(ordered - received),
+        'Unit': 'EA',
+        'SOPrice': Decimal(rng.randint(1000, 50000)) / 100,
+        'OrderStatus': rng.choice(['Complete', 'Open', 'In Production']),
+        'Case/Roll Qty': Decimal(rng.choice([500, 1000, 2000])),
+        'SONum': str(so_num),
+        'SOLine': str(so_line),
+        'created_at': '2025-08-04T18:44:46.123456Z',
+        'updated_at': '2025-08-05T09:12:03.654321Z',
+    }
+
+
+def make_page(count, seed=42):
+    """Items as the boto3 resource API returns them (numbers as Decimal)."""
+    rng = random.Random(seed)
+    return [make_item(i, rng) for i in range(count)]
@@ -1,18 +1,33 @@
 import json
 import boto3
 import os
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
 from datetime import datetime
 from decimal import Decimal
+from serialization import dumps
+from admin_auth import validate_admin_api_key
+from http_responses import build_response, get_body, get_if_match, version_conflict, version_etag
+from tenant_versions import bump_tenant_version
+from idempotency import idempotent
+from data_keys import canonical_data_id
+from expressions import VERSION_ATTRIBUTE, build_update, version_condition
+from bulk_upsert import bulk_upsert
+from content_hash import content_hash
+from column_schema import get_schema, put_schema
+from column_types import coerce
+from payload_codec import configured_codec, merge_packed, strip_packed_attributes, unpack_item
+from purge import create_purge, get_job
 
 dynamodb = boto3.resource('dynamodb')
-secrets_client = boto3.client('secretsmanager')
+sqs_client = boto3.client('sqs')
+deserializer = TypeDeserializer()
 
-# Custom JSON encoder for Decimal types
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# SQS rejects message bodies over 256 KB
+MAX_MESSAGE_BYTES = 256 * 1024
+
+# Keeps a batch request well inside the 6 MB Lambda payload limit and timeout
+BATCH_MAX_RECORDS = int(os.environ.get('BATCH_MAX_RECORDS', 5000))
 
 def lambda_handler(event, context):
     try:
@@ -20,90 +35,225 @@ def lambda_handler(event, context):
         if not validate_admin_api_key(event):
             return {
                 'statusCode': 401,
-                'body': json.dumps({'error': 'Invalid admin API key'}) + '\n'
+                'body': dumps({'error': 'Invalid admin API key'}) + '\n'
             }
         
         http_method = event['httpMethod']
+        resource = event.get('resource') or '/admin/upsert'
         
-        if http_method == 'PUT':
-            return upsert_data(event)
+        if resource == '/admin/upsert/batch' and http_method == 'PUT':
+            return idempotent(event, 'admin', upsert_batch, event)
+        elif resource == '/admin/schema' and http_method == 'PUT':
+            return update_schema(event)
+        elif resource == '/admin/data/{customer_id}' and http_method == 'DELETE':
+            return create_purge(event)
+        elif resource == '/admin/jobs/{jobId}' and http_method == 'GET':
+            return get_job(event)
+        elif http_method == 'PUT':
+            return idempotent(event, 'admin', upsert_data, event)
         else:
             return {
                 'statusCode': 405,
-                'body': json.dumps({'error': 'Method not allowed'}) + '\n'
+                'body': dumps({'error': 'Method not allowed'}) + '\n'
             }
             
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)}) + '\n'
+            'body': dumps({'error': str(e)}) + '\n'
         }
 
-def validate_admin_api_key(event):
-    try:
-        # Get admin API key from header
-        headers = event.get('headers', {})
-        provided_key = headers.get('X-Admin-API-Key') or headers.get('x-admin-api-key')
-        
-        if not provided_key:
-            return False
-        
-        # Get admin API key from secrets manager
-        secret_response = secrets_client.get_secret_value(
-            SecretId=os.environ['ADMIN_API_KEY_SECRET']
-        )
-        admin_key = json.loads(secret_response['SecretString'])['admin_api_key']
-        
-        return provided_key == admin_key
-    except Exception:
-        return False
-
 def upsert_data(event):
-    body = json.loads(event['body'])
+    body = json.loads(get_body(event), parse_float=Decimal)
     customer_id = body.get('customer_id')
-    data_id = body.get('data_id')
     data = body.get('data', {})
+    # Sales order lines are keyed by their sortable SONum/SOLine encoding
+    try:
+        data_id = canonical_data_id(body.get('data_id'), data)
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': dumps({'error': str(e)}) + '\n'
+        }
     
     if not customer_id or not data_id:
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': 'customer_id and data_id are required'}) + '\n'
+            'body': dumps({'error': 'customer_id and data_id are required'}) + '\n'
+        }
+    
+    # Numbers and dates are stored typed when the tenant has a column schema
+    try:
+        data = strip_packed_attributes(coerce(data, get_schema(customer_id)))
+        expected_version = get_if_match(event)
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': dumps({'error': str(e)}) + '\n'
         }
     
+    query_params = event.get('queryStringParameters') or {}
+    if query_params.get('mode') == 'async':
+        if expected_version is not None:
+            return {
+                'statusCode': 400,
+                'body': dumps({'error': 'If-Match is not supported with mode=async'}) + '\n'
+            }
+        return enqueue_upsert(event, customer_id, data_id, data)
+    
     table = dynamodb.Table(os.environ['CUSTOMER_DATA_TABLE'])
     
-    # Prepare item for upsert
-    item = {
-        'customer_id': customer_id,
-        'data_id': data_id,
-        'updated_at': datetime.utcnow().isoformat() + 'Z'
-    }
+    now = datetime.utcnow().isoformat() + 'Z'
+    data_hash = content_hash(data)
+    key = {'customer_id': customer_id, 'data_id': data_id}
+    values = {'updated_at': now, **data, 'content_hash': data_hash}
+    if configured_codec():
+        status, item = merge_packed(table, key, values, now, expected_version, skip_if_hash=data_hash)
+    else:
+        status, item = update_fields(table, key, values, now, expected_version)
+    
+    if status == 'conflict':
+        return version_conflict(event, (item or {}).get(VERSION_ATTRIBUTE))
     
-    # Add all data fields
-    for key, value in data.items():
-        item[key] = value
+    item = unpack_item(item)
+    current_version = item.get(VERSION_ATTRIBUTE)
+    etag = version_etag(current_version) if current_version is not None else None
+    if status == 'unchanged':
+        return build_response(event, 200, {
+            'message': 'Data unchanged',
+            'status': 'unchanged',
+            'item': item
+        }, etag=etag)
+    
+    bump_tenant_version(customer_id)
     
-    # Add created_at only if it's a new item
+    return build_response(event, 200, {
+        'message': 'Data upserted successfully',
+        'status': status,
+        'item': item
+    }, etag=etag)
+
+def update_fields(table, key, values, now, expected_version):
+    """Merge values into the item with one UpdateItem; returns (status, item).
+
+    The update keeps the original created_at and is skipped when the
+    content hash matches what was last written.
+    """
+    update = build_update(values, if_not_exists={'created_at': now}, increment={VERSION_ATTRIBUTE: 1})
+    condition = '(attribute_not_exists(content_hash) OR content_hash <> :content_hash)'
+    update['ExpressionAttributeValues'][':content_hash'] = values['content_hash']
+    if expected_version is not None:
+        version_check, version_values = version_condition(expected_version)
+        condition = f'{version_check} AND {condition}'
+        update['ExpressionAttributeValues'].update(version_values)
+    update['ConditionExpression'] = condition
     try:
-        existing_item = table.get_item(
-            Key={'customer_id': customer_id, 'data_id': data_id}
+        response = table.update_item(
+            Key=key,
+            ReturnValues='ALL_NEW',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+            **update
         )
-        if 'Item' not in existing_item:
-            item['created_at'] = datetime.utcnow().isoformat() + 'Z'
-    except Exception:
-        item['created_at'] = datetime.utcnow().isoformat() + 'Z'
-    
-    # Upsert the item
-    table.put_item(Item=item)
-    
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'message': 'Data upserted successfully',
-            'item': item
-        }, cls=DecimalEncoder) + '\n'
-    }
\ No newline at end of file
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        item = {name: deserializer.deserialize(value) for name, value in e.response.get('Item', {}).items()}
+        current_version = item.get(VERSION_ATTRIBUTE)
+        if expected_version is not None and (not item or (expected_version != '*' and current_version != expected_version)):
+            return 'conflict', item
+        return 'unchanged', item
+    
+    item = response['Attributes']
+    return ('created' if item['created_at'] == now else 'updated'), item
+
+def update_schema(event):
+    """Replace a tenant's column types, or seed them from `defaults`.
+
+    Applies to rows written afterwards.
+    """
+    body = json.loads(get_body(event))
+    customer_id = body.get('customer_id')
+    if not customer_id:
+        return {
+            'statusCode': 400,
+            'body': dumps({'error': 'customer_id is required'}) + '\n'
+        }
+    
+    try:
+        schema = put_schema(customer_id, body.get('columns'), body.get('defaults'))
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': dumps({'error': str(e)}) + '\n'
+        }
+    
+    return build_response(event, 200, {
+        'message': 'Column schema saved',
+        'schema': schema
+    })
+
+def enqueue_upsert(event, customer_id, data_id, data):
+    """Queue a validated upsert for the consumer function and return 202."""
+    message = dumps({'customer_id': customer_id, 'data_id': data_id, 'data': data})
+    if len(message.encode()) > MAX_MESSAGE_BYTES:
+        return {
+            'statusCode': 413,
+            'body': dumps({'error': 'Record too large for async mode'}) + '\n'
+        }
+    
+    response = sqs_client.send_message(
+        QueueUrl=os.environ['UPSERT_QUEUE_URL'],
+        MessageBody=message
+    )
+    return build_response(event, 202, {
+        'message': 'Upsert queued',
+        'status': 'queued',
+        'message_id': response['MessageId'],
+        'customer_id': customer_id,
+        'data_id': data_id
+    })
+
+def upsert_batch(event):
+    """Upsert many records from a JSON array or NDJSON body."""
+    body = get_body(event).strip()
+    
+    # DynamoDB rejects floats, so numbers are parsed straight to Decimal
+    if body.startswith('['):
+        try:
+            records = json.loads(body, parse_float=Decimal)
+        except ValueError:
+            return {
+                'statusCode': 400,
+                'body': dumps({'error': 'Body must be a JSON array or NDJSON'}) + '\n'
+            }
+    else:
+        records = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line, parse_float=Decimal))
+            except ValueError:
+                # Reported as a per-record error below
+                records.append(None)
+    
+    if not records:
+        return {
+            'statusCode': 400,
+            'body': dumps({'error': 'No records in request body'}) + '\n'
+        }
+    if len(records) > BATCH_MAX_RECORDS:
+        return {
+            'statusCode': 413,
+            'body': dumps({'error': f'At most {BATCH_MAX_RECORDS} records per request'}) + '\n'
+        }
+    
+    results = bulk_upsert(records)
+    failed = sum(1 for result in results if result['status'] in ('error', 'conflict'))
+    
+    return build_response(event, 200, {
+        'message': 'Batch processed',
+        'received': len(records),
+        'failed': failed,
+        'results': results
+    })
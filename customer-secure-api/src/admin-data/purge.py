@@ -0,0 +1,86 @@
+"""Tenant purges: DELETE /admin/data/{customer_id} and GET /admin/jobs/{jobId}.
+
+A purge records a job in the jobs table and invokes the purge worker
+(src/purge-worker/) asynchronously. The worker deletes the tenant's items,
+optionally only those whose data_id starts with `prefix`, and records its
+progress on the job so it can be polled and resumed.
+"""
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import boto3
+
+from http_responses import build_response
+
+dynamodb = boto3.resource('dynamodb')
+lambda_client = boto3.client('lambda')
+
+# Job records expire after this
+PURGE_RETENTION_DAYS = 7
+
+
+def create_purge(event):
+    customer_id = (event.get('pathParameters') or {}).get('customer_id')
+    prefix = (event.get('queryStringParameters') or {}).get('prefix')
+    if not customer_id:
+        return build_response(event, 400, {'error': 'customer_id is required'})
+
+    now = datetime.utcnow()
+    job_id = uuid.uuid4().hex
+    job = {
+        'job_id': job_id,
+        'job_type': 'purge',
+        'customer_id': customer_id,
+        'status': 'PENDING',
+        'deleted_count': 0,
+        'created_at': now.isoformat() + 'Z',
+        'expires_at': int((now + timedelta(days=PURGE_RETENTION_DAYS)).timestamp())
+    }
+    if prefix:
+        job['prefix'] = prefix
+    dynamodb.Table(os.environ['JOBS_TABLE']).put_item(Item=job)
+
+    lambda_client.invoke(
+        FunctionName=os.environ['PURGE_WORKER_FUNCTION'],
+        InvocationType='Event',
+        Payload=json.dumps({'job_id': job_id}).encode()
+    )
+
+    response = build_response(event, 202, {
+        'job_id': job_id,
+        'status': 'PENDING',
+        'customer_id': customer_id,
+        'prefix': prefix
+    })
+    response['headers']['Location'] = f"/admin/jobs/{job_id}"
+    return response
+
+
+def get_job(event):
+    job_id = (event.get('pathParameters') or {}).get('jobId')
+    job = None
+    if job_id:
+        job = dynamodb.Table(os.environ['JOBS_TABLE']).get_item(
+            Key={'job_id': job_id}
+        ).get('Item')
+
+    if not job:
+        return build_response(event, 404, {'error': 'Job not found'})
+
+    result = {
+        'job_id': job_id,
+        'job_type': job['job_type'],
+        'customer_id': job['customer_id'],
+        'status': job['status'],
+        'created_at': job['created_at']
+    }
+    for field in ('prefix', 'format', 'started_at', 'completed_at', 'error'):
+        if field in job:
+            result[field] = job[field]
+    for field in ('deleted_count', 'item_count', 'invocations', 'failures'):
+        if field in job:
+            result[field] = int(job[field])
+
+    return build_response(event, 200, result)
@@ -1,28 +1,71 @@
 import json
+import base64
+import hashlib
+import threading
 import boto3
 import os
-from boto3.dynamodb.conditions import Key
-from decimal import Decimal
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from serialization import dumps, dumps_bytes
+from http_responses import (
+    build_response, etag_matches, get_body, get_header, get_if_match, negotiate_encoding, negotiate_media_type,
+    not_modified, version_conflict, version_etag
+)
+from tenant_versions import bump_tenant_version, get_tenant_version
+from ttl_cache import TTLCache
+from columnar import encode_columnar
+from cursors import decode_cursor, encode_cursor
+from exports import create_export, get_export
+from idempotency import idempotent
+from expressions import VERSION_ATTRIBUTE, build_update, version_condition
+from payload_codec import (CODEC_ATTRIBUTE, PAYLOAD_ATTRIBUTE, configured_codec, decode_payload, merge_packed,
+                           strip_packed_attributes, unpack_item)
+from data_keys import (CANONICAL_DATA_ID, LEGACY_DATA_ID_COMPAT, SEPARATOR, SONUM_WIDTH, canonical_data_id,
+                       canonical_to_legacy, encode_segment, legacy_to_canonical)
+import prefetch
 
 dynamodb = boto3.resource('dynamodb')
+dynamodb_client = boto3.client('dynamodb')
+serializer = TypeSerializer()
 
-# Custom JSON encoder for Decimal types
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Read raw AttributeValues with the low-level client instead of going
+# through the resource layer's Decimal conversion
+FAST_DESERIALIZE = os.environ.get('FAST_DESERIALIZE', 'false').lower() == 'true'
+
+# Page assembly limits
+MAX_PAGE_LIMIT = int(os.environ.get('MAX_PAGE_LIMIT', 1000))
+TENANT_MAX_PAGE_LIMITS = json.loads(os.environ.get('TENANT_MAX_PAGE_LIMITS') or '{}')
+# Stay well below the 6 MB Lambda response payload limit
+RESPONSE_BYTE_BUDGET = int(os.environ.get('RESPONSE_BYTE_BUDGET', 4 * 1024 * 1024))
+
+# Fetch page k+1 in the background after serving page k
+PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', 'false').lower() == 'true'
+thread_state = threading.local()
+
+# Serialized GET /data responses cached per warm container; 0 disables
+PAGE_CACHE_TTL_SECONDS = float(os.environ.get('PAGE_CACHE_TTL_SECONDS', 0))
+page_cache = TTLCache(
+    max_entries=int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('PAGE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+)
 
 def lambda_handler(event, context):
     try:
         # Get customer ID from authorizer context
         customer_id = event['requestContext']['authorizer']['customerId']
         http_method = event['httpMethod']
+        resource = event.get('resource') or '/data'
         
-        if http_method == 'GET':
+        if resource == '/data/exports' and http_method == 'POST':
+            return create_export(customer_id, event)
+        elif resource == '/data/exports/{exportId}' and http_method == 'GET':
+            return get_export(customer_id, event)
+        elif resource == '/data/count' and http_method == 'GET':
+            return count_data(customer_id, event)
+        elif http_method == 'GET':
             return get_data(customer_id, event)
         elif http_method == 'POST':
-            return post_data(customer_id, event)
+            return idempotent(event, customer_id, post_data, customer_id, event)
         else:
             return {
                 'statusCode': 405,
@@ -30,9 +73,19 @@ def lambda_handler(event, context):
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({'error': 'Method not allowed'}) + '\n'
+                'body': dumps({'error': 'Method not allowed'}) + '\n'
             }
             
+    except ValueError as e:
+        # Malformed parameters or request body
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': dumps({'error': str(e)}) + '\n'
+        }
     except Exception as e:
         return {
             'statusCode': 500,
@@ -40,64 +93,382 @@ def lambda_handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({'error': str(e)}) + '\n'
+            'body': dumps({'error': str(e)}) + '\n'
         }
 
 def get_data(customer_id, event):
     # Get query parameters
     query_params = event.get('queryStringParameters') or {}
     limit = int(query_params.get('limit', 50))  # Default 50 items per page
+    limit = max(1, min(limit, get_max_page_limit(customer_id)))
     next_token = query_params.get('nextToken')
     
-    # Query DynamoDB with customer isolation
-    table = dynamodb.Table(os.environ['CUSTOMER_DATA_TABLE'])
-        
-    query_kwargs = {
-        'KeyConditionExpression': Key('customer_id').eq(customer_id),
-        'Limit': limit
-    }
+    output_format = query_params.get('format', 'json')
+    if output_format not in ('json', 'columnar'):
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': dumps({'error': 'format must be json or columnar'}) + '\n'
+        }
     
-    # Add pagination token if provided
+    # Malformed or foreign cursors are rejected rather than restarting at page one
+    exclusive_start_key = None
     if next_token:
-        try:
-            import base64
-            exclusive_start_key = json.loads(base64.b64decode(next_token).decode())
-            query_kwargs['ExclusiveStartKey'] = exclusive_start_key
-        except Exception:
-            pass  # Invalid token, ignore
+        exclusive_start_key = decode_cursor(customer_id, next_token)
+    
+    media_type = negotiate_media_type(get_header(event, 'Accept'))
     
-    response = table.query(**query_kwargs)
+    tenant_version = None
+    if PAGE_CACHE_TTL_SECONDS > 0 or PREFETCH_ENABLED:
+        tenant_version = get_tenant_version(customer_id)
+    
+    # Serve repeated requests from this container while the tenant is unchanged
+    cache_key = None
+    if PAGE_CACHE_TTL_SECONDS > 0:
+        cache_key = (
+            customer_id,
+            tenant_version,
+            tuple(sorted(query_params.items())),
+            media_type,
+            negotiate_encoding(get_header(event, 'Accept-Encoding'))
+        )
+        cached = page_cache.get(cache_key)
+        if cached:
+            response, etag = cached
+            if etag_matches(get_header(event, 'If-None-Match'), etag):
+                return not_modified(etag)
+            return dict(response, headers={**response['headers'], 'X-Cache': 'Hit'})
+    
+    query_kwargs = build_query(customer_id, query_params)
+    prefetched = None
+    if PREFETCH_ENABLED and exclusive_start_key:
+        prefetched = prefetch.take(prefetch_key(customer_id, query_params), tenant_version)
+    if prefetched:
+        items, last_key = prefetched
+    else:
+        items, last_key, page_bytes = fetch_page(customer_id, query_kwargs, limit, exclusive_start_key)
+    
+    if LEGACY_DATA_ID_COMPAT:
+        items = [with_legacy_id(item) for item in items]
+    
+    # Unchanged pages skip serialization and transfer entirely
+    etag = compute_etag(customer_id, query_params, media_type, items, last_key)
+    if etag_matches(get_header(event, 'If-None-Match'), etag):
+        return not_modified(etag)
     
     # Prepare response
-    result = {
-        'customer_id': customer_id,
-        'data': response['Items'],
-        'count': response['Count']
-    }
+    if output_format == 'columnar':
+        columns, rows, absent = encode_columnar(items)
+        result = {
+            'customer_id': customer_id,
+            'format': 'columnar',
+            'columns': columns,
+            'rows': rows,
+            'count': len(items)
+        }
+        if absent:
+            result['absent'] = absent
+    else:
+        result = {
+            'customer_id': customer_id,
+            'data': items,
+            'count': len(items)
+        }
     
     # Add next token if more data available
-    if 'LastEvaluatedKey' in response:
-        import base64
-        next_token = base64.b64encode(
-            json.dumps(response['LastEvaluatedKey']).encode()
-        ).decode()
+    if last_key:
+        next_token = encode_cursor(customer_id, last_key)
         result['nextToken'] = next_token
+        
+        # Sequential paginators ask for the next page right after this one
+        if PREFETCH_ENABLED:
+            prefetch.start(
+                prefetch_key(customer_id, dict(query_params, nextToken=next_token)),
+                tenant_version,
+                fetch_page, customer_id, query_kwargs, limit, last_key
+            )
     
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps(result, cls=DecimalEncoder) + '\n'
+    response = build_response(event, 200, result, etag=etag, media_type=media_type)
+    if cache_key and response['statusCode'] == 200:
+        page_cache.put(cache_key, (response, etag), len(response['body']), PAGE_CACHE_TTL_SECONDS)
+        response = dict(response, headers={**response['headers'], 'X-Cache': 'Miss'})
+    return response
+
+def prefetch_key(customer_id, query_params):
+    return (customer_id, tuple(sorted(query_params.items())))
+
+def compute_etag(customer_id, query_params, media_type, items, last_key):
+    """Strong validator derived from item keys and write timestamps.
+
+    Cheaper than hashing the serialized body and lets unchanged pages be
+    answered before serialization.
+    """
+    digest = hashlib.sha256(f"{customer_id}\0{media_type}".encode())
+    for name in sorted(query_params):
+        digest.update(f"\0{name}={query_params[name]}".encode())
+    for item in items:
+        version = item.get('updated_at') or item.get('created_at')
+        if version is None:
+            version = json.dumps(item, default=float, sort_keys=True)
+        digest.update(f"\0{item['data_id']}\0{version}".encode())
+    if last_key:
+        digest.update(f"\0next={last_key['data_id']}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+def get_max_page_limit(customer_id):
+    # Per-tenant overrides, e.g. {"Calyx Containers": 2000}
+    return int(TENANT_MAX_PAGE_LIMITS.get(customer_id, MAX_PAGE_LIMIT))
+
+def count_data(customer_id, event):
+    """Count matching items, or check whether any exist, without returning them."""
+    query_params = event.get('queryStringParameters') or {}
+    exists_only = query_params.get('exists', '').lower() == 'true'
+    
+    query_kwargs = build_query(customer_id, query_params)
+    query_kwargs['Select'] = 'COUNT'
+    query_kwargs['ReturnConsumedCapacity'] = 'TOTAL'
+    if exists_only and 'FilterExpression' not in query_kwargs:
+        query_kwargs['Limit'] = 1
+    
+    count = 0
+    scanned_count = 0
+    consumed_capacity = 0.0
+    while True:
+        response = run_query(query_kwargs)
+        count += response['Count']
+        scanned_count += response['ScannedCount']
+        consumed_capacity += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+        
+        if exists_only and count:
+            break
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    if exists_only:
+        result = {'customer_id': customer_id, 'exists': count > 0}
+    else:
+        result = {'customer_id': customer_id, 'count': count}
+    
+    response = build_response(event, 200, result)
+    response['headers']['X-Debug-Consumed-Capacity'] = f"{consumed_capacity:g}"
+    response['headers']['X-Debug-Scanned-Count'] = str(scanned_count)
+    response['headers']['Access-Control-Expose-Headers'] = 'X-Debug-Consumed-Capacity, X-Debug-Scanned-Count'
+    return response
+
+def build_query(customer_id, query_params):
+    """Query parameters for the customer's partition plus the optional filters.
+
+    prefix: data_id begins with the value
+    from / to: inclusive data_id range (either end may be omitted)
+    since: items created or updated at or after an ISO-8601 timestamp
+    """
+    prefix = query_params.get('prefix')
+    range_from = query_params.get('from')
+    range_to = query_params.get('to')
+    since = query_params.get('since')
+    
+    if prefix and (range_from or range_to):
+        raise ValueError('prefix cannot be combined with from/to')
+    if LEGACY_DATA_ID_COMPAT:
+        prefix, range_from, range_to = legacy_filters(customer_id, prefix, range_from, range_to)
+    
+    key_condition, values = key_condition_for(customer_id, prefix, range_from, range_to)
+    
+    query_kwargs = {
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeValues': values
     }
+    
+    if since:
+        # Items written before updated_at existed only carry created_at
+        query_kwargs['FilterExpression'] = (
+            'updated_at >= :since OR '
+            '(attribute_not_exists(updated_at) AND created_at >= :since)'
+        )
+        values[':since'] = since
+    
+    return query_kwargs
+
+def key_condition_for(customer_id, prefix=None, range_from=None, range_to=None):
+    # Query DynamoDB with customer isolation
+    key_condition = 'customer_id = :customer_id'
+    values = {':customer_id': customer_id}
+    
+    if prefix:
+        key_condition += ' AND begins_with(data_id, :prefix)'
+        values[':prefix'] = prefix
+    elif range_from and range_to:
+        key_condition += ' AND data_id BETWEEN :from AND :to'
+        values[':from'] = range_from
+        values[':to'] = range_to
+    elif range_from:
+        key_condition += ' AND data_id >= :from'
+        values[':from'] = range_from
+    elif range_to:
+        key_condition += ' AND data_id <= :to'
+        values[':to'] = range_to
+    
+    return key_condition, values
+
+def legacy_filters(customer_id, prefix, range_from, range_to):
+    """Translate legacy "SONum-SOLine" filters for tenants with sales order data.
+
+    "invoice7-12" or "2025-08" look like legacy ids too, so the filters
+    are only translated when the first item they would then match has a
+    canonical data_id; otherwise they are applied as sent.
+    """
+    filters = (prefix, range_from, range_to)
+    translated = (
+        prefix and legacy_prefix(prefix),
+        range_from and (legacy_to_canonical(range_from) or range_from),
+        range_to and (legacy_to_canonical(range_to) or range_to)
+    )
+    if translated == filters:
+        return filters
+    
+    key_condition, values = key_condition_for(customer_id, *translated)
+    response = run_query({
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeValues': values,
+        'ProjectionExpression': 'data_id',
+        'Limit': 1
+    })
+    if any(CANONICAL_DATA_ID.fullmatch(item['data_id']) for item in response['Items']):
+        return translated
+    return filters
+
+def legacy_prefix(prefix):
+    # "104449-1" is a whole legacy id, "104449-" every line of one order
+    if prefix.endswith('-'):
+        try:
+            return encode_segment(prefix[:-1], SONUM_WIDTH) + SEPARATOR
+        except ValueError:
+            return prefix
+    return legacy_to_canonical(prefix) or prefix
+
+def with_legacy_id(item):
+    legacy_id = canonical_to_legacy(item.get('data_id', ''))
+    return dict(item, legacy_data_id=legacy_id) if legacy_id else item
+
+def fetch_page(customer_id, base_query, limit, exclusive_start_key=None):
+    """Assemble one page from as many Query calls as needed.
+
+    Stops once `limit` items are collected or the serialized items would
+    exceed RESPONSE_BYTE_BUDGET. Returns the items and the key to resume
+    from (the key of the last emitted item), or None when the partition
+    is exhausted, plus the serialized size of the items.
+    """
+    items = []
+    page_bytes = 0
+    
+    while len(items) < limit:
+        query_kwargs = dict(base_query, Limit=limit - len(items))
+        if exclusive_start_key:
+            query_kwargs['ExclusiveStartKey'] = exclusive_start_key
+        
+        response = run_query(query_kwargs)
+        
+        for item in response['Items']:
+            item_bytes = len(dumps_bytes(item)) + 1
+            # Always emit at least one item so pagination can make progress
+            if items and page_bytes + item_bytes > RESPONSE_BYTE_BUDGET:
+                return items, item_key(customer_id, items[-1]), page_bytes
+            items.append(item)
+            page_bytes += item_bytes
+        
+        exclusive_start_key = response.get('LastEvaluatedKey')
+        if not exclusive_start_key:
+            return items, None, page_bytes
+    
+    return items, item_key(customer_id, items[-1]), page_bytes
+
+def run_query(query_kwargs):
+    """Query the customer data table, returning items as plain Python values."""
+    table_name = os.environ['CUSTOMER_DATA_TABLE']
+    if not FAST_DESERIALIZE:
+        response = thread_resource().Table(table_name).query(**query_kwargs)
+        if 'Items' in response:
+            response['Items'] = [unpack_item(item) for item in response['Items']]
+        return response
+    
+    query_kwargs = dict(query_kwargs)
+    for param in ('ExpressionAttributeValues', 'ExclusiveStartKey'):
+        if param in query_kwargs:
+            query_kwargs[param] = {
+                name: serializer.serialize(value)
+                for name, value in query_kwargs[param].items()
+            }
+    
+    response = dynamodb_client.query(TableName=table_name, **query_kwargs)
+    if 'Items' in response:
+        response['Items'] = [deserialize_item(item) for item in response['Items']]
+    if 'LastEvaluatedKey' in response:
+        response['LastEvaluatedKey'] = deserialize_item(response['LastEvaluatedKey'])
+    return response
+
+def thread_resource():
+    # boto3 resources are not thread-safe; prefetch threads get their own
+    if threading.current_thread() is threading.main_thread():
+        return dynamodb
+    if not hasattr(thread_state, 'dynamodb'):
+        thread_state.dynamodb = boto3.session.Session().resource('dynamodb')
+    return thread_state.dynamodb
+
+def deserialize_item(item):
+    if CODEC_ATTRIBUTE not in item:
+        return {name: deserialize_attribute(value) for name, value in item.items()}
+    # Compressed data fields; plain attributes written since are newer
+    item = dict(item)
+    fields = decode_payload(item.pop(PAYLOAD_ATTRIBUTE)['B'], item.pop(CODEC_ATTRIBUTE)['S'], native=True)
+    fields.update((name, deserialize_attribute(value)) for name, value in item.items())
+    return fields
+
+def deserialize_attribute(value):
+    """Convert one AttributeValue straight to a JSON-ready value.
+
+    Numbers become int or float directly rather than Decimal, so the
+    result serializes without an encoder callback.
+    """
+    if 'S' in value:
+        return value['S']
+    if 'N' in value:
+        return parse_number(value['N'])
+    if 'M' in value:
+        return {name: deserialize_attribute(v) for name, v in value['M'].items()}
+    if 'L' in value:
+        return [deserialize_attribute(v) for v in value['L']]
+    if 'BOOL' in value:
+        return value['BOOL']
+    if 'NULL' in value:
+        return None
+    if 'SS' in value:
+        return value['SS']
+    if 'NS' in value:
+        return [parse_number(n) for n in value['NS']]
+    if 'B' in value:
+        return base64.b64encode(value['B']).decode()
+    if 'BS' in value:
+        return [base64.b64encode(b).decode() for b in value['BS']]
+    raise ValueError(f"Unsupported attribute value: {value}")
+
+def parse_number(number):
+    if '.' in number or 'e' in number or 'E' in number:
+        return float(number)
+    return int(number)
+
+def item_key(customer_id, item):
+    return {'customer_id': customer_id, 'data_id': item['data_id']}
 
 def post_data(customer_id, event):
     from datetime import datetime
     import uuid
     
     # Parse request body
-    body = json.loads(event['body'])
+    body = json.loads(get_body(event))
     
     # Validate required fields
     if 'name' not in body:
@@ -107,36 +478,84 @@ def post_data(customer_id, event):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({'error': 'name field is required'}) + '\n'
+            'body': dumps({'error': 'name field is required'}) + '\n'
+        }
+    
+    try:
+        expected_version = get_if_match(event)
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': dumps({'error': str(e)}) + '\n'
         }
     
-    # Prepare item for insertion
     table = dynamodb.Table(os.environ['CUSTOMER_DATA_TABLE'])
     
-    item = {
-        'customer_id': customer_id,
-        'data_id': body.get('data_id', str(uuid.uuid4())),
+    now = datetime.utcnow().isoformat() + 'Z'
+    try:
+        data_id = canonical_data_id(body.get('data_id'), body)
+    except ValueError:
+        # SONum/SOLine that cannot be encoded are kept as plain fields
+        data_id = None
+    data_id = data_id or str(uuid.uuid4())
+    values = {
         'name': body['name'],
         'value': body.get('value', 0),
-        'created_at': datetime.utcnow().isoformat() + 'Z'
+        'updated_at': now
     }
     
     # Add any additional fields from request
-    for key, value in body.items():
-        if key not in ['customer_id', 'data_id', 'name', 'value', 'created_at']:
-            item[key] = value
+    for key, value in strip_packed_attributes(body).items():
+        if key not in ['customer_id', 'data_id', 'name', 'value', 'created_at', 'updated_at', VERSION_ATTRIBUTE,
+                       'content_hash']:
+            values[key] = value
     
-    # Insert item
-    table.put_item(Item=item)
+    key = {'customer_id': customer_id, 'data_id': data_id}
+    # The stored content_hash describes the last admin payload, which this
+    # merge changes; dropping it keeps the next identical upsert from being skipped
+    if configured_codec():
+        status, item = merge_packed(table, key, values, now, expected_version, remove=('content_hash',))
+        if status == 'conflict':
+            return version_conflict(event, (item or {}).get(VERSION_ATTRIBUTE))
+    else:
+        # UpdateItem rather than PutItem so the version is incremented atomically
+        # and a concurrent writer's fields are merged rather than replaced
+        update = build_update(values, if_not_exists={'created_at': now}, increment={VERSION_ATTRIBUTE: 1},
+                              remove=('content_hash',))
+        if expected_version is not None:
+            update['ConditionExpression'], version_values = version_condition(expected_version)
+            update['ExpressionAttributeValues'].update(version_values)
+        try:
+            response = table.update_item(
+                Key=key,
+                ReturnValues='ALL_NEW',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD',
+                **update
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            current = e.response.get('Item', {}).get(VERSION_ATTRIBUTE)
+            return version_conflict(event, deserialize_attribute(current) if current else None)
+        item = unpack_item(response['Attributes'])
+    
+    bump_tenant_version(customer_id)
     
+    created = item['created_at'] == now
     return {
-        'statusCode': 201,
+        'statusCode': 201 if created else 200,
         'headers': {
             'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
+            'Access-Control-Allow-Origin': '*',
+            'ETag': version_etag(item[VERSION_ATTRIBUTE]),
+            'Access-Control-Expose-Headers': 'ETag'
         },
-        'body': json.dumps({
-            'message': 'Data created successfully',
+        'body': dumps({
+            'message': 'Data created successfully' if created else 'Data updated successfully',
             'item': item
-        }, cls=DecimalEncoder) + '\n'
-    }
\ No newline at end of file
+        }) + '\n'
+    }
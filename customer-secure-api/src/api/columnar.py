@@ -0,0 +1,56 @@
+"""Columnar page envelope for GET /data?format=columnar.
+
+Instead of repeating every attribute name in every item, a page lists the
+column names once and sends each item as an array of values:
+
+    {"columns": ["data_id", "SONum", ...], "rows": [["0000104449#00001", "104449", ...], ...]}
+
+Columns are ordered from most to least populated, with data_id first, so
+attributes missing from an item tend to fall at the end of its row. Those
+trailing positions are dropped. A missing attribute anywhere else is sent
+as null and listed as a [row, column] index pair in "absent" (omitted when
+empty), so an attribute that is really null still round-trips.
+"""
+from collections import Counter
+from itertools import chain
+
+MISSING = object()
+
+
+def encode_columnar(items, omit=('customer_id',)):
+    """Return (columns, rows, absent) for a list of items."""
+    counts = Counter(chain.from_iterable(items))
+    for name in omit:
+        counts.pop(name, None)
+    
+    # sorted() is stable, so equally populated columns keep first-seen order
+    columns = sorted(counts, key=counts.get, reverse=True)
+    if 'data_id' in counts:
+        columns.remove('data_id')
+        columns.insert(0, 'data_id')
+    
+    rows = []
+    absent = []
+    for row_index, item in enumerate(items):
+        get = item.get
+        row = [get(name, MISSING) for name in columns]
+        while row and row[-1] is MISSING:
+            row.pop()
+        if MISSING in row:
+            for column_index, value in enumerate(row):
+                if value is MISSING:
+                    row[column_index] = None
+                    absent.append([row_index, column_index])
+        rows.append(row)
+    return columns, rows, absent
+
+
+def decode_columnar(payload):
+    """Reference client decoder: rebuild the item dicts from a columnar page."""
+    columns = payload['columns']
+    absent = {(row_index, column_index) for row_index, column_index in payload.get('absent', ())}
+    return [
+        {name: value for column_index, (name, value) in enumerate(zip(columns, row))
+         if (row_index, column_index) not in absent}
+        for row_index, row in enumerate(payload['rows'])
+    ]
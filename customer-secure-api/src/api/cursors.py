@@ -0,0 +1,60 @@
+"""Opaque pagination cursors for GET /data.
+
+A cursor carries only what the next query needs: the data_id to resume
+after. customer_id is implied by the caller, and is bound into a
+truncated HMAC so a cursor issued to one tenant cannot be replayed by
+another or tampered with. Layout before base64url encoding:
+
+    version (1 byte) | data_id (UTF-8) | HMAC-SHA256 (first 12 bytes)
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+
+import boto3
+
+CURSOR_VERSION = 1
+MAC_BYTES = 12
+
+secrets_client = boto3.client('secretsmanager')
+signing_key = None
+
+
+def encode_cursor(customer_id, last_key):
+    payload = bytes([CURSOR_VERSION]) + last_key['data_id'].encode()
+    token = payload + sign(customer_id, payload)
+    return base64.urlsafe_b64encode(token).rstrip(b'=').decode()
+
+
+def decode_cursor(customer_id, cursor):
+    """Return the ExclusiveStartKey for cursor, or raise ValueError."""
+    try:
+        token = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    except ValueError:
+        raise ValueError('Invalid nextToken')
+
+    payload, mac = token[:-MAC_BYTES], token[-MAC_BYTES:]
+    if len(payload) < 2 or payload[0] != CURSOR_VERSION:
+        raise ValueError('Invalid nextToken')
+    if not hmac.compare_digest(mac, sign(customer_id, payload)):
+        raise ValueError('Invalid nextToken')
+
+    return {'customer_id': customer_id, 'data_id': payload[1:].decode()}
+
+
+def sign(customer_id, payload):
+    message = customer_id.encode() + b'\0' + payload
+    return hmac.new(get_signing_key(), message, hashlib.sha256).digest()[:MAC_BYTES]
+
+
+def get_signing_key():
+    # Fetched once per container
+    global signing_key
+    if signing_key is None:
+        secret_response = secrets_client.get_secret_value(
+            SecretId=os.environ['CURSOR_SECRET_NAME']
+        )
+        signing_key = json.loads(secret_response['SecretString'])['secret'].encode()
+    return signing_key
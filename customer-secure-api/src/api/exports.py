@@ -0,0 +1,95 @@
+"""Asynchronous bulk exports: POST /data/exports and GET /data/exports/{exportId}.
+
+Creating an export records a job in the jobs table and invokes the export
+worker (src/export-worker/) asynchronously. The worker streams the tenant's
+partition to S3; polling the job returns a presigned download URL once it
+has completed.
+"""
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import boto3
+from botocore.config import Config
+
+from http_responses import build_response, get_body
+
+dynamodb = boto3.resource('dynamodb')
+lambda_client = boto3.client('lambda')
+s3_client = boto3.client('s3', config=Config(signature_version='s3v4'))
+
+EXPORT_FORMATS = ('ndjson', 'parquet')
+EXPORT_URL_EXPIRY_SECONDS = 3600
+# Job records (and the exported objects, via the bucket lifecycle) expire after this
+EXPORT_RETENTION_DAYS = 7
+
+
+def create_export(customer_id, event):
+    body = json.loads(get_body(event) or '{}')
+    export_format = body.get('format', 'ndjson')
+    
+    if export_format not in EXPORT_FORMATS:
+        return build_response(event, 400, {'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"})
+    
+    now = datetime.utcnow()
+    export_id = uuid.uuid4().hex
+    job = {
+        'job_id': export_id,
+        'job_type': 'export',
+        'customer_id': customer_id,
+        'format': export_format,
+        'status': 'PENDING',
+        'item_count': 0,
+        'created_at': now.isoformat() + 'Z',
+        'expires_at': int((now + timedelta(days=EXPORT_RETENTION_DAYS)).timestamp())
+    }
+    dynamodb.Table(os.environ['JOBS_TABLE']).put_item(Item=job)
+    
+    lambda_client.invoke(
+        FunctionName=os.environ['EXPORT_WORKER_FUNCTION'],
+        InvocationType='Event',
+        Payload=json.dumps({'job_id': export_id}).encode()
+    )
+    
+    response = build_response(event, 202, {
+        'export_id': export_id,
+        'status': 'PENDING',
+        'format': export_format
+    })
+    response['headers']['Location'] = f"/data/exports/{export_id}"
+    return response
+
+
+def get_export(customer_id, event):
+    export_id = (event.get('pathParameters') or {}).get('exportId')
+    job = None
+    if export_id:
+        job = dynamodb.Table(os.environ['JOBS_TABLE']).get_item(
+            Key={'job_id': export_id}
+        ).get('Item')
+    
+    # Never reveal another tenant's jobs
+    if not job or job.get('job_type') != 'export' or job['customer_id'] != customer_id:
+        return build_response(event, 404, {'error': 'Export not found'})
+    
+    result = {
+        'export_id': export_id,
+        'status': job['status'],
+        'format': job['format'],
+        'item_count': int(job.get('item_count', 0)),
+        'created_at': job['created_at']
+    }
+    if job['status'] == 'COMPLETED':
+        result['completed_at'] = job['completed_at']
+        result['size_bytes'] = int(job['size_bytes'])
+        result['download_url'] = s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': os.environ['TRANSFER_BUCKET'], 'Key': job['s3_key']},
+            ExpiresIn=EXPORT_URL_EXPIRY_SECONDS
+        )
+        result['expires_in'] = EXPORT_URL_EXPIRY_SECONDS
+    elif job['status'] == 'FAILED':
+        result['error'] = job.get('error')
+    
+    return build_response(event, 200, result)
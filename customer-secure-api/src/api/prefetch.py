@@ -0,0 +1,82 @@
+"""Background prefetch of the next GET /data page.
+
+After serving page k, the data API can start fetching page k+1 on a worker
+thread and keep the result in memory, keyed by the query parameters the
+client will send with the returned nextToken. A follow-up request that
+lands on the same warm container is then served without a DynamoDB round
+trip on its critical path.
+
+Lambda freezes the container once a response is returned, so a prefetch
+that has not finished by then resumes when the next invocation thaws the
+container; take() waits up to PREFETCH_WAIT_SECONDS for it.
+
+Emits PrefetchIssued / PrefetchHit / PrefetchMiss / PrefetchStale metrics;
+the hit rate is PrefetchHit / (PrefetchHit + PrefetchMiss).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import emit_metric
+from ttl_cache import TTLCache
+
+PREFETCH_TTL_SECONDS = float(os.environ.get('PREFETCH_TTL_SECONDS', 30))
+PREFETCH_WAIT_SECONDS = float(os.environ.get('PREFETCH_WAIT_SECONDS', 5))
+PREFETCH_MAX_INFLIGHT = int(os.environ.get('PREFETCH_MAX_INFLIGHT', 4))
+
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='prefetch')
+cache = TTLCache(
+    max_entries=int(os.environ.get('PREFETCH_MAX_ENTRIES', 32)),
+    max_bytes=int(os.environ.get('PREFETCH_MAX_BYTES', 32 * 1024 * 1024))
+)
+inflight = {}
+lock = threading.Lock()
+
+
+def start(key, version, fetch, *args):
+    """Run fetch(*args) in the background; it must return (items, last_key, size)."""
+    with lock:
+        if key in inflight or len(inflight) >= PREFETCH_MAX_INFLIGHT or cache.get(key):
+            return
+        future = executor.submit(fetch, *args)
+        inflight[key] = (future, version)
+    future.add_done_callback(lambda done: finish(key, done))
+    emit_metric('PrefetchIssued')
+
+
+def finish(key, future):
+    with lock:
+        # A request already claimed the result straight from the future
+        claimed = inflight.pop(key, None)
+    if claimed is None:
+        return
+    version = claimed[1]
+    if future.exception() is None:
+        items, last_key, size = future.result()
+        cache.put(key, (version, items, last_key), size, PREFETCH_TTL_SECONDS)
+
+
+def take(key, version):
+    """Return the prefetched (items, last_key) for key, or None."""
+    entry = cache.pop(key)
+    if entry is None:
+        with lock:
+            claimed = inflight.pop(key, None)
+        if claimed is None:
+            emit_metric('PrefetchMiss')
+            return None
+        # Compare against the tenant version the prefetch was issued at
+        future, issued_version = claimed
+        try:
+            items, last_key, size = future.result(timeout=PREFETCH_WAIT_SECONDS)
+        except Exception:
+            emit_metric('PrefetchMiss')
+            return None
+        entry = (issued_version, items, last_key)
+
+    # The tenant has been written to since the prefetch was issued
+    if version is not None and entry[0] != version:
+        emit_metric('PrefetchStale')
+        return None
+    emit_metric('PrefetchHit')
+    return entry[1], entry[2]
@@ -4,19 +4,21 @@ import jwt
 import hashlib
 import os
 from datetime import datetime, timedelta
+from serialization import dumps
+from http_responses import get_body
 
 dynamodb = boto3.resource('dynamodb')
 secrets_client = boto3.client('secretsmanager')
 
 def lambda_handler(event, context):
     try:
-        body = json.loads(event['body'])
+        body = json.loads(get_body(event))
         api_key = body.get('api_key')
         
         if not api_key:
             return {
                 'statusCode': 400,
-                'body': json.dumps({'error': 'API key required'}) + '\n'
+                'body': dumps({'error': 'API key required'}) + '\n'
             }
         
         # Validate API key
@@ -25,7 +27,7 @@ def lambda_handler(event, context):
         if not customer_id:
             return {
                 'statusCode': 401,
-                'body': json.dumps({'error': 'Invalid API key'}) + '\n'
+                'body': dumps({'error': 'Invalid API key'}) + '\n'
             }
         
         # Generate JWT
@@ -37,7 +39,7 @@ def lambda_handler(event, context):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': dumps({
                 'token': token,
                 'expires_in': 3600
             }) + '\n'
@@ -46,7 +48,7 @@ def lambda_handler(event, context):
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)}) + '\n'
+            'body': dumps({'error': str(e)}) + '\n'
         }
 
 def validate_api_key(api_key):
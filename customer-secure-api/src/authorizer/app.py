@@ -22,8 +22,10 @@ def lambda_handler(event, context):
         payload = jwt.decode(token, secret, algorithms=['HS256'])
         customer_id = payload['customer_id']
         
-        # Generate policy
-        policy = generate_policy(customer_id, 'Allow', event['methodArn'])
+        # Generate policy for every route of the API: API Gateway caches the
+        # authorizer result per token, so a policy for only the first
+        # method called would deny the customer's other routes
+        policy = generate_policy(customer_id, 'Allow', api_resource_arn(event['methodArn']))
         policy['context'] = {
             'customerId': customer_id
         }
@@ -48,4 +50,9 @@ def generate_policy(principal_id, effect, resource):
                 'Resource': resource
             }]
         }
-    }
\ No newline at end of file
+    }
+
+def api_resource_arn(method_arn):
+    # arn:aws:execute-api:region:account:api-id/stage/METHOD/path -> .../stage/*
+    api_arn, stage = method_arn.split('/')[:2]
+    return f"{api_arn}/{stage}/*"
\ No newline at end of file
@@ -0,0 +1,207 @@
+import boto3
+import os
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from serialization import dumps_bytes
+from payload_codec import unpack_item
+
+dynamodb = boto3.resource('dynamodb')
+s3_client = boto3.client('s3')
+
+# S3 multipart parts must be at least 5 MB (except the last one)
+PART_SIZE = 8 * 1024 * 1024
+# Items buffered per Parquet row group
+ROW_GROUP_SIZE = 10000
+
+def lambda_handler(event, context):
+    """Stream one tenant's partition to S3 for an export job.
+
+    Invoked asynchronously by the data API with {"job_id": ...}.
+    """
+    jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
+    job_id = event['job_id']
+    job = jobs_table.get_item(Key={'job_id': job_id})['Item']
+    
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #status = :running, started_at = :now',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':running': 'RUNNING', ':now': now()}
+    )
+    
+    try:
+        items = iter_partition(job['customer_id'], jobs_table, job_id)
+        if job['format'] == 'parquet':
+            s3_key = f"exports/{job_id}.parquet"
+            item_count, size_bytes = write_parquet(items, s3_key)
+        else:
+            s3_key = f"exports/{job_id}.ndjson.gz"
+            item_count, size_bytes = write_ndjson_gzip(items, s3_key)
+    except Exception as e:
+        print(f"Export {job_id} failed: {e}")
+        jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET #status = :failed, #error = :error',
+            ExpressionAttributeNames={'#status': 'status', '#error': 'error'},
+            ExpressionAttributeValues={':failed': 'FAILED', ':error': str(e)}
+        )
+        raise
+    
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #status = :completed, s3_key = :key, item_count = :count, '
+                         'size_bytes = :size, completed_at = :now',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={
+            ':completed': 'COMPLETED',
+            ':key': s3_key,
+            ':count': item_count,
+            ':size': size_bytes,
+            ':now': now()
+        }
+    )
+
+def now():
+    return datetime.utcnow().isoformat() + 'Z'
+
+def iter_partition(customer_id, jobs_table, job_id):
+    """Yield every item of the tenant, one Query page at a time."""
+    table = dynamodb.Table(os.environ['CUSTOMER_DATA_TABLE'])
+    query_kwargs = {
+        'KeyConditionExpression': 'customer_id = :customer_id',
+        'ExpressionAttributeValues': {':customer_id': customer_id}
+    }
+    item_count = 0
+    
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response['Items']:
+            yield unpack_item(item)
+        
+        # Report progress once per page
+        item_count += response['Count']
+        jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET item_count = :count',
+            ExpressionAttributeValues={':count': item_count}
+        )
+        
+        if 'LastEvaluatedKey' not in response:
+            return
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def write_ndjson_gzip(items, s3_key):
+    """Gzip-compressed NDJSON via multipart upload; holds at most one part in memory."""
+    bucket = os.environ['TRANSFER_BUCKET']
+    upload_id = s3_client.create_multipart_upload(
+        Bucket=bucket,
+        Key=s3_key,
+        # Not ContentEncoding: clients would decompress the download and keep the .gz name
+        ContentType='application/gzip'
+    )['UploadId']
+    
+    # wbits=31 writes a gzip header and trailer
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    buffer = bytearray()
+    parts = []
+    item_count = 0
+    size_bytes = 0
+    
+    def upload_part(data):
+        response = s3_client.upload_part(
+            Bucket=bucket,
+            Key=s3_key,
+            UploadId=upload_id,
+            PartNumber=len(parts) + 1,
+            Body=bytes(data)
+        )
+        parts.append({'PartNumber': len(parts) + 1, 'ETag': response['ETag']})
+    
+    try:
+        for item in items:
+            buffer += compressor.compress(dumps_bytes(item) + b'\n')
+            item_count += 1
+            if len(buffer) >= PART_SIZE:
+                upload_part(buffer)
+                size_bytes += len(buffer)
+                buffer.clear()
+        
+        buffer += compressor.flush()
+        upload_part(buffer)
+        size_bytes += len(buffer)
+        
+        s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+    except Exception:
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=s3_key, UploadId=upload_id)
+        raise
+    
+    return item_count, size_bytes
+
+def write_parquet(items, s3_key):
+    """Parquet written one row group at a time to /tmp, then uploaded.
+
+    Items are schemaless, so the columns are taken from the first row
+    group and stored as strings. Attributes first seen later go into a
+    JSON-encoded "_extra" column.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    path = f"/tmp/{os.path.basename(s3_key)}"
+    writer = None
+    columns = None
+    item_count = 0
+    
+    try:
+        for batch in iter_batches(items, ROW_GROUP_SIZE):
+            if writer is None:
+                columns = dict.fromkeys(name for item in batch for name in item)
+                schema = pa.schema([(name, pa.string()) for name in [*columns, '_extra']])
+                writer = pq.ParquetWriter(path, schema, compression='zstd')
+            
+            data = {name: [to_text(item.get(name)) for item in batch] for name in columns}
+            data['_extra'] = [to_text(extra_attributes(item, columns)) for item in batch]
+            writer.write_table(pa.table(data, schema=schema))
+            item_count += len(batch)
+        
+        if writer is None:
+            writer = pq.ParquetWriter(path, pa.schema([('_extra', pa.string())]))
+        writer.close()
+        
+        s3_client.upload_file(
+            path,
+            os.environ['TRANSFER_BUCKET'],
+            s3_key,
+            ExtraArgs={'ContentType': 'application/vnd.apache.parquet'}
+        )
+        return item_count, os.path.getsize(path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def extra_attributes(item, columns):
+    extra = {name: value for name, value in item.items() if name not in columns}
+    return extra or None
+
+def to_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (Decimal, int, float, bool)):
+        return str(value)
+    return dumps_bytes(value).decode()
@@ -0,0 +1,132 @@
+import codecs
+import csv
+import json
+import os
+import tempfile
+from collections import Counter
+from datetime import datetime
+from urllib.parse import unquote_plus
+
+import boto3
+
+from bulk_upsert import bulk_upsert
+from serialization import dumps
+from spreadsheet_rows import missing_columns, row_to_record
+
+s3_client = boto3.client('s3')
+
+# Rows handed to bulk_upsert at a time
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 500))
+# Per-row errors listed in the manifest; the counts cover all of them
+MAX_MANIFEST_ERRORS = 1000
+
+def lambda_handler(event, context):
+    """Load each spreadsheet uploaded under imports/ and write a manifest beside it."""
+    manifests = []
+    for record in event['Records']:
+        bucket = record['s3']['bucket']['name']
+        key = unquote_plus(record['s3']['object']['key'])
+        manifests.append(ingest_object(bucket, key))
+    return {'manifests': manifests}
+
+def ingest_object(bucket, key):
+    manifest = {
+        'source': f's3://{bucket}/{key}',
+        'status': 'COMPLETED',
+        'started_at': datetime.utcnow().isoformat() + 'Z',
+        'rows': 0,
+        'skipped_rows': 0,
+        'counts': Counter(),
+        'errors': []
+    }
+
+    try:
+        rows = iter_rows(bucket, key)
+        batch = []
+        for row_number, row in rows:
+            manifest['rows'] += 1
+            try:
+                record = row_to_record(row)
+            except ValueError as e:
+                manifest['counts']['error'] += 1
+                add_error(manifest, row_number, str(e))
+                continue
+            if record is None:
+                # Missing Customer, SONum or SOLine, as the utility skips them
+                manifest['skipped_rows'] += 1
+                continue
+            batch.append((row_number, record))
+            if len(batch) >= INGEST_BATCH_SIZE:
+                write_batch(manifest, batch)
+                batch = []
+        if batch:
+            write_batch(manifest, batch)
+    except Exception as e:
+        manifest['status'] = 'FAILED'
+        manifest['error'] = str(e)
+
+    manifest['completed_at'] = datetime.utcnow().isoformat() + 'Z'
+    manifest_key = key.rsplit('.', 1)[0] + '.manifest.json'
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=manifest_key,
+        Body=dumps(manifest).encode(),
+        ContentType='application/json'
+    )
+    print(json.dumps({'source': manifest['source'], 'status': manifest['status'],
+                      'rows': manifest['rows'], 'counts': dict(manifest['counts'])}))
+    return manifest_key
+
+def write_batch(manifest, batch):
+    results = bulk_upsert([record for _, record in batch])
+    for (row_number, _), result in zip(batch, results):
+        manifest['counts'][result['status']] += 1
+        if result['status'] in ('error', 'conflict'):
+            add_error(manifest, row_number, result['error'])
+
+def add_error(manifest, row_number, message):
+    if len(manifest['errors']) < MAX_MANIFEST_ERRORS:
+        manifest['errors'].append({'row': row_number, 'error': message})
+
+def iter_rows(bucket, key):
+    """Yield (row number, {column: value}) with the header as row 1."""
+    extension = key.rsplit('.', 1)[-1].lower()
+    if extension == 'csv':
+        return iter_csv_rows(bucket, key)
+    if extension == 'xlsx':
+        return iter_xlsx_rows(bucket, key)
+    raise ValueError(f'Unsupported file type: {key}')
+
+def iter_csv_rows(bucket, key):
+    # Decoded and parsed as it streams from S3
+    body = s3_client.get_object(Bucket=bucket, Key=key)['Body']
+    reader = csv.reader(codecs.getreader('utf-8-sig')(body))
+    header = [column.strip() for column in next(reader, [])]
+    check_columns(header)
+    for row_number, values in enumerate(reader, start=2):
+        if any(values):
+            yield row_number, {column: value or None for column, value in zip(header, values)}
+
+def iter_xlsx_rows(bucket, key):
+    from openpyxl import load_workbook
+
+    # XLSX is a zip archive, so it needs a seekable local copy
+    with tempfile.NamedTemporaryFile(suffix='.xlsx') as f:
+        s3_client.download_fileobj(bucket, key, f)
+        f.flush()
+        # read_only streams rows instead of loading the whole sheet
+        workbook = load_workbook(f.name, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(column).strip() if column is not None else '' for column in next(rows, ())]
+            check_columns(header)
+            for row_number, values in enumerate(rows, start=2):
+                if any(value is not None for value in values):
+                    yield row_number, dict(zip(header, values))
+        finally:
+            workbook.close()
+
+def check_columns(header):
+    missing = missing_columns(header)
+    if missing:
+        raise ValueError(f'Missing required columns: {missing}')
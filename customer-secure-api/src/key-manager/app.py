@@ -4,9 +4,11 @@ import secrets
 import hashlib
 import os
 from datetime import datetime
+from serialization import dumps
+from admin_auth import validate_admin_api_key
+from http_responses import get_body
 
 dynamodb = boto3.resource('dynamodb')
-secrets_client = boto3.client('secretsmanager')
 
 def lambda_handler(event, context):
     try:
@@ -14,7 +16,7 @@ def lambda_handler(event, context):
         if not validate_admin_api_key(event):
             return {
                 'statusCode': 401,
-                'body': json.dumps({'error': 'Invalid admin API key'}) + '\n'
+                'body': dumps({'error': 'Invalid admin API key'}) + '\n'
             }
         
         http_method = event['httpMethod']
@@ -26,43 +28,24 @@ def lambda_handler(event, context):
         else:
             return {
                 'statusCode': 405,
-                'body': json.dumps({'error': 'Method not allowed'}) + '\n'
+                'body': dumps({'error': 'Method not allowed'}) + '\n'
             }
             
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)}) + '\n'
+            'body': dumps({'error': str(e)}) + '\n'
         }
 
-def validate_admin_api_key(event):
-    try:
-        # Get admin API key from header
-        headers = event.get('headers', {})
-        provided_key = headers.get('X-Admin-API-Key') or headers.get('x-admin-api-key')
-        
-        if not provided_key:
-            return False
-        
-        # Get admin API key from secrets manager
-        secret_response = secrets_client.get_secret_value(
-            SecretId=os.environ['ADMIN_API_KEY_SECRET']
-        )
-        admin_key = json.loads(secret_response['SecretString'])['admin_api_key']
-        
-        return provided_key == admin_key
-    except Exception:
-        return False
-
 def create_api_key(event):
-    body = json.loads(event['body'])
+    body = json.loads(get_body(event))
     customer_id = body.get('customer_id')
     customer_name = body.get('customer_name')
     
     if not customer_id or not customer_name:
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': 'customer_id and customer_name required'}) + '\n'
+            'body': dumps({'error': 'customer_id and customer_name required'}) + '\n'
         }
     
     table = dynamodb.Table(os.environ['API_KEYS_TABLE'])
@@ -112,7 +95,7 @@ def create_api_key(event):
                         'Content-Type': 'application/json',
                         'Access-Control-Allow-Origin': '*'
                     },
-                    'body': json.dumps({
+                    'body': dumps({
                         'api_key': api_key,
                         'customer_id': customer_id,
                         'message': 'API key reactivated successfully'
@@ -122,7 +105,7 @@ def create_api_key(event):
                 # API key exists and is active
                 return {
                     'statusCode': 409,
-                    'body': json.dumps({'error': f'Active API key for customer ID {customer_id} already exists'}) + '\n'
+                    'body': dumps({'error': f'Active API key for customer ID {customer_id} already exists'}) + '\n'
                 }
     except Exception as e:
         print(f"Error checking customer_id: {e}")
@@ -136,7 +119,7 @@ def create_api_key(event):
         if response['Items']:
             return {
                 'statusCode': 409,
-                'body': json.dumps({'error': f'Customer name "{customer_name}" already exists for an active API key'}) + '\n'
+                'body': dumps({'error': f'Customer name "{customer_name}" already exists for an active API key'}) + '\n'
             }
     except Exception as e:
         print(f"Error checking customer_name: {e}")
@@ -160,7 +143,7 @@ def create_api_key(event):
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*'
         },
-        'body': json.dumps({
+        'body': dumps({
             'api_key': api_key,
             'customer_id': customer_id,
             'message': 'API key created successfully'
@@ -174,7 +157,7 @@ def revoke_api_key(event):
     if not customer_id:
         return {
             'statusCode': 400,
-            'body': json.dumps({'error': 'customer_id required'}) + '\n'
+            'body': dumps({'error': 'customer_id required'}) + '\n'
         }
     
     table = dynamodb.Table(os.environ['API_KEYS_TABLE'])
@@ -189,7 +172,7 @@ def revoke_api_key(event):
         if not response['Items']:
             return {
                 'statusCode': 404,
-                'body': json.dumps({'error': f'API key for customer {customer_id} not found'}) + '\n'
+                'body': dumps({'error': f'API key for customer {customer_id} not found'}) + '\n'
             }
         
         # Mark API key as inactive
@@ -206,7 +189,7 @@ def revoke_api_key(event):
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': dumps({
                 'message': f'API key for customer {customer_id} revoked successfully'
             }) + '\n'
         }
@@ -214,5 +197,5 @@ def revoke_api_key(event):
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': f'Failed to revoke API key: {str(e)}'}) + '\n'
+            'body': dumps({'error': f'Failed to revoke API key: {str(e)}'}) + '\n'
         }
\ No newline at end of file
@@ -0,0 +1,134 @@
+import json
+import boto3
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from batch_writer import WRITE_BATCH_SIZE, batch_delete
+from tenant_versions import bump_tenant_version
+
+dynamodb = boto3.resource('dynamodb')
+lambda_client = boto3.client('lambda')
+
+# Parallel BatchWriteItem calls per page of keys
+PURGE_WORKERS = int(os.environ.get('PURGE_WORKERS', 8))
+# Keys fetched per Query page (key-only, so pages stay small)
+PURGE_PAGE_SIZE = 1000
+# Hand over to a fresh invocation when less time than this remains
+RESUME_MARGIN_MILLIS = 60 * 1000
+# Lambda's async retries per invocation (EventInvokeConfig in template.yaml)
+MAX_RETRY_ATTEMPTS = 2
+
+def lambda_handler(event, context):
+    """Delete a tenant's items (optionally by data_id prefix) for a purge job.
+
+    Invoked asynchronously by the admin function with {"job_id": ...}.
+    Progress (the last deleted key and a running count) is saved on the job
+    after every page; when the invocation runs low on time the worker
+    re-invokes itself and carries on from there. An error leaves the
+    checkpoint in place: the job is RETRYING while Lambda's async retries
+    resume it, and FAILED once they are used up. Any later invocation with
+    the job_id, FAILED or not, resumes it too; only COMPLETED is final.
+    """
+    jobs_table = dynamodb.Table(os.environ['JOBS_TABLE'])
+    job_id = event['job_id']
+    job = jobs_table.get_item(Key={'job_id': job_id})['Item']
+    if job['status'] == 'COMPLETED':
+        return
+
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #status = :running, started_at = if_not_exists(started_at, :now) '
+                         'ADD invocations :one',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':running': 'RUNNING', ':now': now(), ':one': 1}
+    )
+
+    try:
+        finished = purge_partition(job, jobs_table, context)
+    except Exception as e:
+        print(f"Purge {job_id} failed: {e}")
+        # Failures since the last saved page; each page saved resets the count
+        failures = int(job.get('failures', 0)) + 1
+        jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET #status = :status, #error = :error, failures = :failures',
+            ExpressionAttributeNames={'#status': 'status', '#error': 'error'},
+            ExpressionAttributeValues={
+                ':status': 'FAILED' if failures > MAX_RETRY_ATTEMPTS else 'RETRYING',
+                ':error': str(e),
+                ':failures': failures
+            }
+        )
+        raise
+
+    if not finished:
+        lambda_client.invoke(
+            FunctionName=context.function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'job_id': job_id}).encode()
+        )
+        return
+
+    # Drop the tenant's cached pages
+    bump_tenant_version(job['customer_id'])
+    jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #status = :completed, completed_at = :now REMOVE last_key',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':completed': 'COMPLETED', ':now': now()}
+    )
+
+def now():
+    return datetime.utcnow().isoformat() + 'Z'
+
+def purge_partition(job, jobs_table, context):
+    """Delete page by page from the job's checkpoint; False if time ran out first."""
+    table_name = os.environ['CUSTOMER_DATA_TABLE']
+    table = dynamodb.Table(table_name)
+
+    key_condition = 'customer_id = :customer_id'
+    values = {':customer_id': job['customer_id']}
+    if job.get('prefix'):
+        key_condition += ' AND begins_with(data_id, :prefix)'
+        values[':prefix'] = job['prefix']
+    query_kwargs = {
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeValues': values,
+        # Only the keys are needed to delete, so reads cost as little as possible
+        'ProjectionExpression': 'customer_id, data_id',
+        'Limit': PURGE_PAGE_SIZE
+    }
+    if job.get('last_key'):
+        query_kwargs['ExclusiveStartKey'] = job['last_key']
+
+    with ThreadPoolExecutor(max_workers=PURGE_WORKERS) as executor:
+        while True:
+            if context.get_remaining_time_in_millis() < RESUME_MARGIN_MILLIS:
+                return False
+
+            response = table.query(**query_kwargs)
+            keys = response['Items']
+            chunks = [keys[i:i + WRITE_BATCH_SIZE] for i in range(0, len(keys), WRITE_BATCH_SIZE)]
+            failed = [key for chunk in executor.map(lambda c: batch_delete(table_name, c), chunks)
+                      for key in chunk]
+            if failed:
+                raise RuntimeError(f'{len(failed)} deletes still throttled after retries')
+
+            last_key = response.get('LastEvaluatedKey')
+            update = 'ADD deleted_count :count SET updated_at = :now'
+            update_values = {':count': len(keys), ':now': now()}
+            if last_key:
+                update += ', last_key = :last_key'
+                update_values[':last_key'] = last_key
+            # The purge is making progress again
+            update += ' REMOVE failures'
+            jobs_table.update_item(
+                Key={'job_id': job['job_id']},
+                UpdateExpression=update,
+                ExpressionAttributeValues=update_values
+            )
+            job.pop('failures', None)
+
+            if not last_key:
+                return True
+            query_kwargs['ExclusiveStartKey'] = last_key
@@ -0,0 +1,62 @@
+"""Admin API key validation shared by the admin functions.
+
+The admin key is cached per container for ADMIN_KEY_CACHE_SECONDS rather
+than fetched from Secrets Manager on every request. When a presented key
+does not match, the secret is re-read once (at most every
+ADMIN_KEY_REFRESH_SECONDS) so a rotated key is accepted immediately
+without letting bad keys trigger a Secrets Manager call each.
+"""
+import hmac
+import json
+import os
+import threading
+import time
+
+import boto3
+
+from http_responses import get_header
+
+ADMIN_KEY_CACHE_SECONDS = float(os.environ.get('ADMIN_KEY_CACHE_SECONDS', 300))
+ADMIN_KEY_REFRESH_SECONDS = float(os.environ.get('ADMIN_KEY_REFRESH_SECONDS', 10))
+
+secrets_client = boto3.client('secretsmanager')
+lock = threading.Lock()
+cached_key = None
+fetched_at = 0.0
+
+
+def validate_admin_api_key(event):
+    try:
+        provided_key = get_header(event, 'X-Admin-API-Key')
+        if not provided_key:
+            return False
+
+        if keys_match(provided_key, get_admin_key()):
+            return True
+        # The secret may have been rotated since it was cached
+        refreshed_key = get_admin_key(min_age=ADMIN_KEY_REFRESH_SECONDS)
+        return keys_match(provided_key, refreshed_key)
+    except Exception:
+        return False
+
+
+def keys_match(provided_key, admin_key):
+    return hmac.compare_digest(provided_key.encode(), admin_key.encode())
+
+
+def get_admin_key(min_age=None):
+    """Return the cached admin key, re-reading it when expired.
+
+    With min_age, force a re-read if the cached value is at least that old.
+    """
+    global cached_key, fetched_at
+    with lock:
+        age = time.monotonic() - fetched_at
+        max_age = ADMIN_KEY_CACHE_SECONDS if min_age is None else min_age
+        if cached_key is None or age >= max_age:
+            secret_response = secrets_client.get_secret_value(
+                SecretId=os.environ['ADMIN_API_KEY_SECRET']
+            )
+            cached_key = json.loads(secret_response['SecretString'])['admin_api_key']
+            fetched_at = time.monotonic()
+        return cached_key
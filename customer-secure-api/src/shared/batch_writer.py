@@ -0,0 +1,117 @@
+"""Chunked BatchGetItem / BatchWriteItem with unprocessed-key retry.
+
+DynamoDB accepts at most 100 keys per BatchGetItem and 25 requests per
+BatchWriteItem, and may hand back part of any batch as unprocessed when
+a partition is throttled. Both helpers resubmit the remainder with
+exponential backoff and report what still failed instead of raising, so
+callers can return per-record outcomes.
+
+BatchWriteItem cannot carry a condition, so conditional_put() writes
+items that must not overwrite a concurrent change with parallel PutItem
+calls instead. Each costs the same write capacity as a batched put.
+"""
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+GET_BATCH_SIZE = 100
+WRITE_BATCH_SIZE = 25
+MAX_ATTEMPTS = int(os.environ.get('BATCH_MAX_ATTEMPTS', 8))
+BASE_DELAY_SECONDS = 0.05
+# Parallel PutItem calls in conditional_put()
+PUT_WORKERS = int(os.environ.get('BATCH_PUT_WORKERS', 16))
+THROTTLING_ERRORS = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded')
+
+dynamodb = boto3.resource('dynamodb')
+# Low-level clients, unlike resources, can be shared between threads
+dynamodb_client = boto3.client('dynamodb')
+serializer = TypeSerializer()
+
+
+def batch_get(table_name, keys, projection=None):
+    """Fetch items by key; returns {(customer_id, data_id): item} for those found."""
+    found = {}
+    for start in range(0, len(keys), GET_BATCH_SIZE):
+        request = {'Keys': keys[start:start + GET_BATCH_SIZE], 'ConsistentRead': True}
+        if projection:
+            request['ProjectionExpression'] = projection
+        pending = {table_name: request}
+        for attempt in range(MAX_ATTEMPTS):
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            for item in response['Responses'].get(table_name, []):
+                found[(item['customer_id'], item['data_id'])] = item
+            pending = response.get('UnprocessedKeys')
+            if not pending:
+                break
+            backoff(attempt)
+        else:
+            raise RuntimeError('BatchGetItem kept returning unprocessed keys')
+    return found
+
+
+def conditional_put(table_name, requests):
+    """Put each (item, condition, values) in parallel; returns one outcome per request.
+
+    Outcomes are `written`, `conflict` (the condition failed) or `throttled`.
+    """
+    def put(request):
+        item, condition, values = request
+        put_kwargs = {
+            'TableName': table_name,
+            'Item': {name: serializer.serialize(value) for name, value in item.items()},
+            'ConditionExpression': condition
+        }
+        if values:
+            put_kwargs['ExpressionAttributeValues'] = {
+                name: serializer.serialize(value) for name, value in values.items()
+            }
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                dynamodb_client.put_item(**put_kwargs)
+                return 'written'
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'ConditionalCheckFailedException':
+                    return 'conflict'
+                if code not in THROTTLING_ERRORS:
+                    raise
+            backoff(attempt)
+        return 'throttled'
+
+    if not requests:
+        return []
+    with ThreadPoolExecutor(max_workers=min(PUT_WORKERS, len(requests))) as executor:
+        return list(executor.map(put, requests))
+
+
+def batch_delete(table_name, keys):
+    """Delete up to 25 keys; returns the keys that could not be deleted.
+
+    Thread-safe, so callers may delete several chunks in parallel.
+    """
+    if len(keys) > WRITE_BATCH_SIZE:
+        raise ValueError(f'At most {WRITE_BATCH_SIZE} keys per batch')
+    pending = [
+        {'DeleteRequest': {'Key': {name: serializer.serialize(value) for name, value in key.items()}}}
+        for key in keys
+    ]
+    for attempt in range(MAX_ATTEMPTS):
+        response = dynamodb_client.batch_write_item(RequestItems={table_name: pending})
+        pending = response.get('UnprocessedItems', {}).get(table_name)
+        if not pending:
+            return []
+        backoff(attempt)
+    return [
+        {name: value['S'] for name, value in request['DeleteRequest']['Key'].items()}
+        for request in pending
+    ]
+
+
+def backoff(attempt):
+    # Full jitter keeps parallel writers from retrying in lockstep
+    time.sleep(random.uniform(0, BASE_DELAY_SECONDS * 2 ** attempt))
@@ -0,0 +1,120 @@
+"""Bulk upsert of {customer_id, data_id, data} records.
+
+Records get the same treatment as PUT /admin/upsert: data_id is derived
+from SONum/SOLine when present, fields are merged into the stored item
+and created_at is preserved, and typed columns are coerced using the
+tenant's column schema. Records whose content hash matches the stored
+item are skipped.
+
+Merging needs the stored item, so existing items are read with
+BatchGetItem, merged here and put back whole (compressed when
+PAYLOAD_CODEC is set). Each put is conditional on the version that was
+read, so a concurrent write to the same key between the read and the
+put is never overwritten: those records are read and merged again, up
+to MERGE_ATTEMPTS times, and then reported as `conflict`. If-Match is
+not supported here.
+"""
+import os
+from datetime import datetime
+
+from batch_writer import batch_get, conditional_put
+from column_schema import get_schema
+from column_types import coerce
+from content_hash import content_hash
+from data_keys import canonical_data_id
+from expressions import VERSION_ATTRIBUTE, unchanged_condition
+from payload_codec import MERGE_ATTEMPTS, pack_item, strip_packed_attributes, unpack_item
+from tenant_versions import bump_tenant_version
+
+
+def bulk_upsert(records):
+    """Upsert records and return one outcome per input record, in order."""
+    results = [None] * len(records)
+    latest = {}
+    coerced = {}
+    for index, record in enumerate(records):
+        try:
+            key = validate_record(record)
+            coerced[index] = strip_packed_attributes(coerce(record.get('data', {}), get_schema(key[0])))
+        except ValueError as e:
+            results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+            continue
+        # Later records for the same key win, as if sent one by one
+        if key in latest:
+            results[latest[key]] = {'index': latest[key], 'status': 'superseded'}
+        latest[key] = index
+
+    if not latest:
+        return results
+
+    table_name = os.environ['CUSTOMER_DATA_TABLE']
+    statuses = {}
+    pending = list(latest)
+    for attempt in range(MERGE_ATTEMPTS):
+        conflicts = merge_and_put(table_name, pending, latest, coerced, statuses)
+        if not conflicts:
+            break
+        pending = conflicts
+    else:
+        statuses.update((key, 'conflict') for key in conflicts)
+
+    for key, index in latest.items():
+        outcome = {'index': index, 'customer_id': key[0], 'data_id': key[1], 'status': statuses[key]}
+        if statuses[key] == 'throttled':
+            outcome.update(status='error', error='Write throttled; retry this record')
+        elif statuses[key] == 'conflict':
+            outcome['error'] = 'Item kept changing during the upsert; retry this record'
+        results[index] = outcome
+
+    written = {customer_id for (customer_id, _), status in statuses.items() if status in ('created', 'updated')}
+    for customer_id in written:
+        bump_tenant_version(customer_id)
+    return results
+
+
+def merge_and_put(table_name, keys, latest, coerced, statuses):
+    """Read, merge and conditionally put keys; returns those that lost a race."""
+    existing = batch_get(table_name, [{'customer_id': c, 'data_id': d} for c, d in keys])
+
+    now = datetime.utcnow().isoformat() + 'Z'
+    writes = []
+    for key in keys:
+        data = coerced[latest[key]]
+        data_hash = content_hash(data)
+        stored = existing.get(key)
+        # Rows identical to the last import cost no write at all
+        if stored and stored.get('content_hash') == data_hash:
+            statuses[key] = 'unchanged'
+            continue
+        item = dict(unpack_item(stored)) if stored else {'created_at': now}
+        item['updated_at'] = now
+        item.update(data)
+        item.update(customer_id=key[0], data_id=key[1], content_hash=data_hash)
+        item[VERSION_ATTRIBUTE] = (stored or {}).get(VERSION_ATTRIBUTE, 0) + 1
+        writes.append((key, stored, pack_item(item)))
+
+    outcomes = conditional_put(table_name, [
+        (item, *unchanged_condition(stored)) for _, stored, item in writes
+    ])
+    conflicts = []
+    for (key, stored, _), outcome in zip(writes, outcomes):
+        if outcome == 'conflict':
+            conflicts.append(key)
+        elif outcome == 'written':
+            statuses[key] = 'updated' if stored else 'created'
+        else:
+            statuses[key] = outcome
+    return conflicts
+
+
+def validate_record(record):
+    if not isinstance(record, dict):
+        raise ValueError('record must be a JSON object')
+    data = record.get('data', {})
+    if not isinstance(data, dict):
+        raise ValueError('data must be an object')
+    customer_id = record.get('customer_id')
+    data_id = canonical_data_id(record.get('data_id'), data)
+    if not customer_id or not data_id:
+        raise ValueError('customer_id and data_id are required')
+    return str(customer_id), str(data_id)
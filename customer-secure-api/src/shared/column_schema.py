@@ -0,0 +1,62 @@
+"""Per-tenant column schemas (PUT /admin/schema).
+
+A tenant's schema maps column names to one of COLUMN_TYPES and is stored
+in the column schema table; writers pass it to column_types.coerce().
+Schemas are cached per container for SCHEMA_CACHE_SECONDS.
+"""
+import os
+from datetime import datetime
+
+import boto3
+
+from column_types import COLUMN_TYPES
+from ttl_cache import TTLCache
+
+SCHEMA_CACHE_SECONDS = float(os.environ.get('SCHEMA_CACHE_SECONDS', 60))
+
+dynamodb = boto3.resource('dynamodb')
+cache = TTLCache(max_entries=1024, max_bytes=8 * 1024 * 1024)
+
+
+def get_schema(customer_id):
+    """Return {column: type} for the tenant ({} when none is configured)."""
+    table_name = os.environ.get('COLUMN_SCHEMA_TABLE')
+    if not table_name:
+        return {}
+    columns = cache.get(customer_id)
+    if columns is None:
+        item = dynamodb.Table(table_name).get_item(Key={'customer_id': customer_id}).get('Item')
+        columns = item['columns'] if item else {}
+        cache.put(customer_id, columns, 1, SCHEMA_CACHE_SECONDS)
+    return columns
+
+
+def put_schema(customer_id, columns, defaults=None):
+    """Store the tenant's schema.
+
+    columns replaces the stored schema unless defaults are given; then
+    defaults only fill in columns the stored schema does not type yet,
+    and columns still override both.
+    """
+    if defaults is not None:
+        if not isinstance(defaults, dict) or not isinstance(columns or {}, dict):
+            raise ValueError('columns and defaults must be objects')
+        stored = dynamodb.Table(os.environ['COLUMN_SCHEMA_TABLE']).get_item(
+            Key={'customer_id': customer_id},
+            ConsistentRead=True
+        ).get('Item')
+        columns = {**defaults, **(stored['columns'] if stored else {}), **(columns or {})}
+    if not isinstance(columns, dict) or not columns:
+        raise ValueError('columns must be a non-empty object')
+    invalid = sorted(name for name, column_type in columns.items() if column_type not in COLUMN_TYPES)
+    if invalid:
+        raise ValueError(f"Unknown column types for {invalid}; use one of {', '.join(COLUMN_TYPES)}")
+
+    item = {
+        'customer_id': customer_id,
+        'columns': columns,
+        'updated_at': datetime.utcnow().isoformat() + 'Z'
+    }
+    dynamodb.Table(os.environ['COLUMN_SCHEMA_TABLE']).put_item(Item=item)
+    cache.pop(customer_id)
+    return item
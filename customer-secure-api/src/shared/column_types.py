@@ -0,0 +1,81 @@
+"""Coercion of `data` values to a column type.
+
+Numbers become Decimals (stored as DynamoDB Numbers, so they can be
+range-filtered and sorted) and dates become ISO-8601 strings, which sort
+chronologically as text. Times are stored in UTC without an offset;
+times sent without one are taken to be UTC already. Columns without a
+type are left unchanged.
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+from spreadsheet_rows import to_text
+
+COLUMN_TYPES = ('string', 'number', 'date')
+
+# Spreadsheet spellings for date cells, tried in order after ISO-8601
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%m/%d/%Y', '%m/%d/%Y %H:%M:%S')
+
+
+def coerce(data, columns):
+    """Return a copy of data with typed columns converted; raises ValueError."""
+    if not columns:
+        return data
+    coerced = {}
+    for name, value in data.items():
+        column_type = columns.get(name)
+        if value is None or value == '' or column_type is None:
+            coerced[name] = value
+        elif column_type == 'number':
+            coerced[name] = to_number(name, value)
+        elif column_type == 'date':
+            coerced[name] = to_date(name, value)
+        else:
+            coerced[name] = to_text(value)
+    return coerced
+
+
+def to_number(name, value):
+    if isinstance(value, bool):
+        raise ValueError(f'{name}: expected a number, got {value!r}')
+    try:
+        number = Decimal(str(value).strip().replace(',', ''))
+        if not number.is_finite():
+            raise InvalidOperation
+        # '1200.0' is stored as 1200; normalize() alone would give 1.2E+3
+        if number == number.to_integral_value():
+            return number.quantize(Decimal(1))
+        return number.normalize()
+    except InvalidOperation:
+        raise ValueError(f'{name}: expected a number, got {value!r}')
+
+
+def to_date(name, value):
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        return value.isoformat()
+    else:
+        parsed = parse_date(str(value).strip())
+        if parsed is None:
+            raise ValueError(f'{name}: expected a date, got {value!r}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if parsed.time() == datetime.min.time():
+        return parsed.date().isoformat()
+    return parsed.replace(microsecond=0).isoformat()
+
+
+def parse_date(text):
+    # Offsets, `Z` and fractional seconds included
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    return None
+
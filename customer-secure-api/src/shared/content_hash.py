@@ -0,0 +1,31 @@
+"""Stable hashes of upsert payloads for change detection.
+
+Upserts store content_hash on the item and skip the write when an
+incoming payload hashes to the stored value. The hash covers the client
+`data` only, not timestamps, and is independent of key order and of how
+a number was spelled (5, 5.0 and Decimal('5.00') hash the same).
+"""
+import hashlib
+import json
+from decimal import Decimal
+
+
+def content_hash(data):
+    canonical = json.dumps(normalize(data), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def normalize(value):
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, Decimal)):
+        number = Decimal(str(value)).normalize()
+        # Tagged so the number 5 and the string "5" stay distinct
+        return {'#n': format(number, 'f')}
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((normalize(v) for v in value), key=repr)
+    return str(value)
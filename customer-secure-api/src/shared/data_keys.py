@@ -0,0 +1,99 @@
+"""Canonical data_id encoding for sales order lines.
+
+Items loaded from the order spreadsheets used to get data_id
+f"{SONum}-{SOLine}", which DynamoDB sorts as a string, so SO line 10
+lands before line 2 and numeric range reads are impossible. The
+canonical form zero-pads each numeric segment to a fixed width and
+joins them with '#':
+
+    104449, 1   ->  0000104449#00001
+    SO1, 10     ->  SO0000000001#00010
+
+Any alphabetic prefix is kept in front of the padded digits, so keys
+sort by prefix first and then numerically. While LEGACY_DATA_ID_COMPAT
+is on, writers translate a data_id to this form only when it is exactly
+the record's own f"{SONum}-{SOLine}"; any other id is the tenant's own
+choice and is kept as sent.
+"""
+import os
+import re
+
+SONUM_WIDTH = 10
+SOLINE_WIDTH = 5
+SEPARATOR = '#'
+# Accept and return pre-migration "SONum-SOLine" data_ids for one release
+LEGACY_DATA_ID_COMPAT = os.environ.get('LEGACY_DATA_ID_COMPAT', 'false').lower() == 'true'
+
+SEGMENT = re.compile(r'([A-Za-z]*)(\d+)')
+LEGACY_DATA_ID = re.compile(r'([A-Za-z]*\d+)-([A-Za-z]*\d+)')
+CANONICAL_DATA_ID = re.compile(r'([A-Za-z]*\d{%d})#([A-Za-z]*\d{%d})' % (SONUM_WIDTH, SOLINE_WIDTH))
+
+
+def encode_data_id(sonum, soline):
+    return encode_segment(sonum, SONUM_WIDTH) + SEPARATOR + encode_segment(soline, SOLINE_WIDTH)
+
+
+def encode_segment(value, width):
+    # Spreadsheet readers hand back whole numbers as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    match = SEGMENT.fullmatch(str(value).strip())
+    if not match or len(match.group(2).lstrip('0')) > width:
+        raise ValueError(f'Cannot encode {value!r} as a data_id segment')
+    return match.group(1) + match.group(2).zfill(width)
+
+
+def canonical_data_id(data_id, record):
+    """The data_id to store for record: the one given, else derived from SONum/SOLine."""
+    if not data_id:
+        return sales_order_data_id(record)
+    if LEGACY_DATA_ID_COMPAT and is_legacy_data_id(data_id, record):
+        try:
+            return sales_order_data_id(record)
+        except ValueError:
+            pass
+    return data_id
+
+
+def is_legacy_data_id(data_id, record):
+    """Whether data_id is the pre-migration f"{SONum}-{SOLine}" id of record."""
+    if record.get('SONum') in (None, '') or record.get('SOLine') in (None, ''):
+        return False
+    return str(data_id) == f"{legacy_segment(record['SONum'])}-{legacy_segment(record['SOLine'])}"
+
+
+def legacy_segment(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def sales_order_data_id(record):
+    """The canonical data_id for record's SONum/SOLine, or None without them."""
+    if record.get('SONum') not in (None, '') and record.get('SOLine') not in (None, ''):
+        return encode_data_id(record['SONum'], record['SOLine'])
+    return None
+
+
+def legacy_to_canonical(data_id):
+    """Translate a legacy "SONum-SOLine" id, or return None if it is not one."""
+    match = LEGACY_DATA_ID.fullmatch(data_id)
+    if not match:
+        return None
+    try:
+        return encode_data_id(match.group(1), match.group(2))
+    except ValueError:
+        return None
+
+
+def canonical_to_legacy(data_id):
+    """Translate a canonical id back to "SONum-SOLine", or return None."""
+    match = CANONICAL_DATA_ID.fullmatch(data_id)
+    if not match:
+        return None
+    return '-'.join(decode_segment(segment) for segment in match.groups())
+
+
+def decode_segment(segment):
+    match = SEGMENT.fullmatch(segment)
+    return match.group(1) + (match.group(2).lstrip('0') or '0')
@@ -0,0 +1,97 @@
+"""DynamoDB UpdateExpression builder.
+
+Every attribute name goes through an ExpressionAttributeNames placeholder,
+so reserved words (`name`, `status`, `data`) and spreadsheet column names
+with spaces or punctuation ("Job Inv Qty", "Case/Roll Qty") are safe.
+Values are passed whole, so a nested map or list replaces the stored one.
+
+Items carry a `version` that every write increments atomically with ADD;
+version_condition() turns an If-Match value into the matching condition.
+Writers that read, merge and put a whole item back use
+unchanged_condition() so the put only replaces the item they read.
+"""
+
+KEY_ATTRIBUTES = ('customer_id', 'data_id')
+VERSION_ATTRIBUTE = 'version'
+
+
+def build_update(values, if_not_exists=None, skip=KEY_ATTRIBUTES, increment=None, remove=()):
+    """UpdateItem arguments that SET each attribute in `values`.
+
+    Attributes in `if_not_exists` are only written when the item does not
+    already have them (e.g. created_at), those in `increment` are added
+    to atomically (e.g. {'version': 1}) and those in `remove` are
+    deleted. Key attributes are skipped since UpdateItem cannot change
+    them.
+    """
+    if_not_exists = if_not_exists or {}
+    increment = increment or {}
+    names = {}
+    expression_values = {}
+    clauses = []
+
+    def placeholders(name, value):
+        index = len(names)
+        names[f'#a{index}'] = name
+        expression_values[f':v{index}'] = value
+        return f'#a{index}', f':v{index}'
+
+    for name, value in values.items():
+        if name in skip or name in if_not_exists or name in increment:
+            continue
+        name_ref, value_ref = placeholders(name, value)
+        clauses.append(f'{name_ref} = {value_ref}')
+
+    for name, value in if_not_exists.items():
+        name_ref, value_ref = placeholders(name, value)
+        clauses.append(f'{name_ref} = if_not_exists({name_ref}, {value_ref})')
+
+    additions = []
+    for name, value in increment.items():
+        name_ref, value_ref = placeholders(name, value)
+        additions.append(f'{name_ref} {value_ref}')
+
+    removals = []
+    for name in remove:
+        if name in values or name in skip:
+            continue
+        name_ref = f'#r{len(removals)}'
+        names[name_ref] = name
+        removals.append(name_ref)
+
+    if not clauses and not additions:
+        raise ValueError('No attributes to update')
+
+    expression = 'SET ' + ', '.join(clauses) if clauses else ''
+    if additions:
+        expression = f"{expression} ADD {', '.join(additions)}".strip()
+    if removals:
+        expression = f"{expression} REMOVE {', '.join(removals)}".strip()
+    return {
+        'UpdateExpression': expression,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': expression_values
+    }
+
+
+def version_condition(expected):
+    """ConditionExpression and values for an If-Match of `expected`.
+
+    `*` only requires the item to exist; a number requires that version.
+    """
+    if expected == '*':
+        return 'attribute_exists(customer_id)', {}
+    return f'{VERSION_ATTRIBUTE} = :expected_version', {':expected_version': expected}
+
+
+def unchanged_condition(current):
+    """ConditionExpression and values for a put over `current`, as read.
+
+    The put fails if the item was created, changed or deleted since the
+    read; current is None when there was no item.
+    """
+    if current is None:
+        return 'attribute_not_exists(customer_id)', {}
+    if current.get(VERSION_ATTRIBUTE) is None:
+        return f'attribute_exists(customer_id) AND attribute_not_exists({VERSION_ATTRIBUTE})', {}
+    return f'{VERSION_ATTRIBUTE} = :read_version', {':read_version': current[VERSION_ATTRIBUTE]}
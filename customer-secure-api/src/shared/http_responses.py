@@ -0,0 +1,245 @@
+"""HTTP request/response helpers shared by the Lambda handlers.
+
+build_response() negotiates the body format from the Accept header (JSON,
+MessagePack or CBOR), compresses it according to Accept-Encoding and
+base64-encodes binary bodies for API Gateway. Bodies too large for a
+Lambda response are written to S3 and answered with a 303 redirect to a
+presigned URL instead.
+"""
+import base64
+import gzip
+import os
+import uuid
+
+from serialization import JSON_MEDIA_TYPE, dumps, encode, supported_media_types
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Lambda rejects response payloads over 6 MB; leave room for headers
+SPILL_THRESHOLD_BYTES = int(os.environ.get('SPILL_THRESHOLD_BYTES', 5 * 1024 * 1024))
+SPILL_URL_EXPIRY_SECONDS = 3600
+
+s3_client = None
+
+MEDIA_TYPE_ALIASES = {
+    'application/x-msgpack': 'application/msgpack',
+    'application/vnd.msgpack': 'application/msgpack',
+}
+
+
+def build_response(event, status_code, payload, etag=None, media_type=None):
+    """Serialize payload in the negotiated format and wrap it for API Gateway."""
+    if media_type is None:
+        media_type = negotiate_media_type(get_header(event, 'Accept'))
+    headers = {
+        'Content-Type': media_type,
+        'Access-Control-Allow-Origin': '*',
+        'Vary': 'Accept, Accept-Encoding'
+    }
+    if etag:
+        headers['ETag'] = etag
+        headers['Access-Control-Expose-Headers'] = 'ETag'
+    
+    body = encode(payload, media_type)
+    if media_type == JSON_MEDIA_TYPE:
+        body += b'\n'
+    
+    encoding = negotiate_encoding(get_header(event, 'Accept-Encoding'))
+    if encoding and len(body) >= COMPRESSION_MIN_BYTES:
+        if encoding == 'br':
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        headers['Content-Encoding'] = encoding
+        if etag:
+            # Each content-coding is a distinct representation with its own validator
+            headers['ETag'] = f'{etag[:-1]}-{encoding}"'
+    
+    if media_type == JSON_MEDIA_TYPE and 'Content-Encoding' not in headers:
+        response = {'statusCode': status_code, 'headers': headers, 'body': body.decode()}
+    else:
+        # API Gateway decodes the body back to binary before sending it
+        response = {
+            'statusCode': status_code,
+            'headers': headers,
+            'body': base64.b64encode(body).decode(),
+            'isBase64Encoded': True
+        }
+    
+    if len(response['body']) > SPILL_THRESHOLD_BYTES and os.environ.get('RESPONSE_BUCKET'):
+        return spill_response(body, headers)
+    return response
+
+
+def spill_response(body, headers):
+    """Store an oversized body in S3 and redirect the client to it."""
+    global s3_client
+    if s3_client is None:
+        import boto3
+        from botocore.config import Config
+        s3_client = boto3.client('s3', config=Config(signature_version='s3v4'))
+    
+    bucket = os.environ['RESPONSE_BUCKET']
+    key = f"responses/{uuid.uuid4().hex}"
+    put_kwargs = {'Bucket': bucket, 'Key': key, 'Body': body, 'ContentType': headers['Content-Type']}
+    if 'Content-Encoding' in headers:
+        put_kwargs['ContentEncoding'] = headers['Content-Encoding']
+    s3_client.put_object(**put_kwargs)
+    
+    location = s3_client.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket, 'Key': key},
+        ExpiresIn=SPILL_URL_EXPIRY_SECONDS
+    )
+    return {
+        'statusCode': 303,
+        'headers': {
+            'Location': location,
+            'Content-Type': JSON_MEDIA_TYPE,
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'Location'
+        },
+        'body': dumps({
+            'location': location,
+            'size_bytes': len(body),
+            'expires_in': SPILL_URL_EXPIRY_SECONDS
+        }) + '\n'
+    }
+
+
+def not_modified(etag):
+    return {
+        'statusCode': 304,
+        'headers': {
+            'ETag': etag,
+            'Vary': 'Accept, Accept-Encoding',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'ETag'
+        },
+        'body': ''
+    }
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        # Weak comparison, ignoring the content-coding suffix
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        for encoding in ('-gzip"', '-br"'):
+            if candidate.endswith(encoding):
+                candidate = candidate[:-len(encoding)] + '"'
+        if candidate == etag:
+            return True
+    return False
+
+
+def negotiate_media_type(accept):
+    """Pick the response format from an Accept header, defaulting to JSON."""
+    preferences = parse_quality_list(accept)
+    best, best_quality = JSON_MEDIA_TYPE, 0.0
+    for media_type in supported_media_types():
+        family = media_type.split('/')[0] + '/*'
+        quality = preferences.get(media_type, preferences.get(family, preferences.get('*/*', 0.0)))
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick the preferred supported content-coding, or None for identity."""
+    preferences = parse_quality_list(accept_encoding)
+    supported = ['br', 'gzip'] if brotli else ['gzip']
+    wildcard = preferences.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = preferences.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def parse_quality_list(header):
+    """Parse an Accept-style header into {value: q}."""
+    preferences = {}
+    for part in (header or '').split(','):
+        value, *params = part.split(';')
+        value = value.strip().lower()
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        value = MEDIA_TYPE_ALIASES.get(value, value)
+        preferences[value] = max(quality, preferences.get(value, 0.0))
+    return preferences
+
+
+def get_if_match(event):
+    """The item version required by an If-Match header: None, '*' or an int.
+
+    Accepts the quoted ETag returned by writes ("3") as well as a bare 3.
+    Raises ValueError for anything else.
+    """
+    value = get_header(event, 'If-Match')
+    if value is None:
+        return None
+    value = value.strip()
+    if value == '*':
+        return value
+    if value.startswith('W/'):
+        value = value[2:]
+    value = value.strip('"')
+    # Compressed responses suffix the content-coding to the ETag
+    value = value.rsplit('-', 1)[0]
+    if not value.isdigit():
+        raise ValueError('If-Match must be an item version such as "3"')
+    return int(value)
+
+
+def version_etag(version):
+    return f'"{int(version)}"'
+
+
+def version_conflict(event, current_version):
+    """409 for a failed If-Match, with the version the client should re-read."""
+    if current_version is None:
+        return build_response(event, 409, {'error': 'Version conflict', 'current_version': None})
+    return build_response(event, 409, {
+        'error': 'Version conflict',
+        'current_version': int(current_version)
+    }, etag=version_etag(current_version))
+
+
+def get_body(event):
+    # Request bodies arrive base64-encoded since the API accepts binary media types
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode()
+    return body
+
+
+def get_header(event, name):
+    # API Gateway preserves the client's header casing
+    headers = event.get('headers') or {}
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
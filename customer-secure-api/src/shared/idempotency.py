@@ -0,0 +1,124 @@
+"""Idempotency-Key support for write endpoints.
+
+The first request with a given key claims a record in the idempotency
+table with a conditional put, runs the handler and stores its response.
+Retries with the same key and body get the stored response back without
+touching the data table; a retry that arrives while the first attempt is
+still running gets 409, and reusing a key for a different body gets 422.
+Failed attempts (5xx or an exception) release the key so the client can
+retry. Responses are stored gzip-compressed, so even large batch results
+fit in an item. A response still too large to store keeps the key
+completed with only a digest of the response, and retries get 409
+instead of running the request again. Requests without the header, or
+with IDEMPOTENCY_TABLE unset, run as before.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+from http_responses import build_response, get_body, get_header
+
+# How long a completed response can be replayed
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60))
+# After this long an IN_PROGRESS claim is assumed dead (past the Lambda timeout)
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+# Compressed size; leaves headroom under the 400 KB DynamoDB item limit
+MAX_STORED_RESPONSE_BYTES = 350 * 1024
+MAX_KEY_LENGTH = 255
+
+dynamodb = boto3.resource('dynamodb')
+
+
+def idempotent(event, owner, handler, *args):
+    """Run handler(*args) at most once per Idempotency-Key.
+
+    `owner` scopes keys (e.g. the customer ID) so tenants cannot replay
+    each other's responses.
+    """
+    key = get_header(event, 'Idempotency-Key')
+    table_name = os.environ.get('IDEMPOTENCY_TABLE')
+    if not key or not table_name:
+        return handler(*args)
+
+    if len(key) > MAX_KEY_LENGTH:
+        return build_response(event, 400, {
+            'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'
+        })
+
+    table = dynamodb.Table(table_name)
+    record_key = {'idempotency_key': f"{owner}#{event['httpMethod']} {event.get('resource')}#{key}"}
+    request_hash = hashlib.sha256(get_body(event).encode()).hexdigest()
+
+    now = int(time.time())
+    try:
+        table.put_item(
+            Item={
+                **record_key,
+                'status': 'IN_PROGRESS',
+                'request_hash': request_hash,
+                'locked_until': now + IDEMPOTENCY_LOCK_SECONDS,
+                'expires_at': now + IDEMPOTENCY_TTL_SECONDS
+            },
+            # TTL deletion lags, so treat expired records as absent
+            ConditionExpression='attribute_not_exists(idempotency_key) OR expires_at < :now '
+                                'OR (#status = :in_progress AND locked_until < :now)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={':now': now, ':in_progress': 'IN_PROGRESS'}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return replay(event, table, record_key, request_hash)
+
+    try:
+        response = handler(*args)
+    except Exception:
+        table.delete_item(Key=record_key)
+        raise
+
+    if response.get('statusCode', 500) >= 500:
+        table.delete_item(Key=record_key)
+        return response
+
+    serialized = json.dumps(response, separators=(',', ':')).encode()
+    stored = gzip.compress(serialized)
+    if len(stored) > MAX_STORED_RESPONSE_BYTES:
+        # Too large to replay, but the work is done: keep the key so a retry is refused, not rerun
+        attribute, value = 'response_digest', hashlib.sha256(serialized).hexdigest()
+    else:
+        attribute, value = 'response', stored
+    table.update_item(
+        Key=record_key,
+        UpdateExpression='SET #status = :completed, #response = :response',
+        ExpressionAttributeNames={'#status': 'status', '#response': attribute},
+        ExpressionAttributeValues={':completed': 'COMPLETED', ':response': value}
+    )
+    return response
+
+
+def replay(event, table, record_key, request_hash):
+    record = table.get_item(Key=record_key, ConsistentRead=True).get('Item')
+    if not record:
+        # Released between our put and this read; the client may retry
+        return build_response(event, 409, {'error': 'Request with this Idempotency-Key is in progress'})
+    if record['request_hash'] != request_hash:
+        return build_response(event, 422, {'error': 'Idempotency-Key was already used for a different request'})
+    if record['status'] != 'COMPLETED':
+        return build_response(event, 409, {'error': 'Request with this Idempotency-Key is in progress'})
+
+    if 'response' not in record:
+        return build_response(event, 409, {
+            'error': 'Request with this Idempotency-Key already completed; its response was too large to replay',
+            'response_digest': record['response_digest']
+        })
+
+    stored = record['response']
+    # Responses stored before compression are plain JSON strings
+    response = json.loads(stored if isinstance(stored, str) else gzip.decompress(stored.value))
+    response['headers'] = {**response.get('headers', {}), 'Idempotent-Replayed': 'true'}
+    return response
@@ -0,0 +1,26 @@
+"""CloudWatch metrics via the Embedded Metric Format.
+
+Metrics are written to the function's log stream as structured JSON lines
+and extracted by CloudWatch asynchronously, so emitting one costs no API
+call on the request path.
+"""
+import json
+import os
+import time
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'MultiTenantApi')
+
+
+def emit_metric(name, value=1, unit='Count'):
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': [{'Name': name, 'Unit': unit}]
+            }]
+        },
+        'FunctionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        name: value
+    }))
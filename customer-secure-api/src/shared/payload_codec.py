@@ -0,0 +1,181 @@
+"""Compressed storage of item data (PAYLOAD_CODEC).
+
+With PAYLOAD_CODEC set to `zstd` or `gzip`, writers store every data field
+of a customer data item as one compressed JSON document in the binary
+`_payload` attribute, with the codec named in `_payload_codec`. An item
+is packed exactly when it has `_payload_codec`; writers drop both names
+from client data (strip_packed_attributes()), so no client field can be
+mistaken for a payload. Keys and
+the metadata the table's expressions use (timestamps, version,
+content_hash) stay plain attributes. DynamoDB bills reads per 4 KB and
+writes per 1 KB of item size, and most of a spreadsheet row's size is
+its repeated column names.
+
+Order lines are only a few hundred bytes, too small for a compressor to
+find much repetition on its own, so both codecs start from a preset
+dictionary of the spreadsheet's column names (zstd with a raw-content
+dictionary, `gzip` as raw DEFLATE with a zlib preset dictionary). The
+stored codec marker names the dictionary version, which must never
+change once items are written with it. Items that would not get smaller
+are left plain.
+
+unpack_item() restores the plain form and leaves unpacked items alone, so
+readers work whichever way an item was written and the setting can be
+changed at any time. zstd needs the zstandard package; without it,
+writers fall back to gzip. Numbers go through JSON as int or float, so
+values beyond float precision (17 significant digits) are rounded.
+
+Fields cannot be merged inside a compressed attribute by an UpdateItem,
+so single writes use merge_packed(): a consistent read, then a put that
+is conditional on the version read.
+"""
+import json
+import os
+import zlib
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+from expressions import KEY_ATTRIBUTES, VERSION_ATTRIBUTE, unchanged_condition
+from serialization import dumps_bytes, native_numbers
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PAYLOAD_ATTRIBUTE = '_payload'
+CODEC_ATTRIBUTE = '_payload_codec'
+PACKED_ATTRIBUTES = (PAYLOAD_ATTRIBUTE, CODEC_ATTRIBUTE)
+# Stay plain so key conditions, filters and conditional writes can use them
+PLAIN_ATTRIBUTES = KEY_ATTRIBUTES + ('created_at', 'updated_at', VERSION_ATTRIBUTE, 'content_hash')
+
+DEFLATE_LEVEL = 9
+ZSTD_LEVEL = 3
+# Roughly what the _payload and _payload_codec attributes add to an item
+PACK_OVERHEAD_BYTES = 32
+
+# Preset dictionary version 1: the order spreadsheet's columns, in sheet order
+DICTIONARY_COLUMNS = (
+    'Plant', 'JobCode', 'JobLine', 'CustPO', 'ItemGroup', 'ItemCode', 'ItemDesc', 'PlanAvailDate',
+    'CustItemRef', 'Job Inv Qty', 'Job Ord Qty', 'Job Recd Qty', 'SO Shipped Qty', 'Job Outst Qty',
+    'Unit', 'SOPrice', 'OrderStatus', 'Case/Roll Qty', 'SONum', 'SOLine'
+)
+DICTIONARY = dumps_bytes({column: '' for column in DICTIONARY_COLUMNS})
+ZSTD_DICTIONARY = zstandard and zstandard.ZstdCompressionDict(DICTIONARY, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+CODEC_MARKERS = {'zstd': 'zstd-1', 'gzip': 'deflate-1'}
+# Read-merge-put rounds before a write that keeps racing is reported as a conflict
+MERGE_ATTEMPTS = 3
+
+
+def configured_codec():
+    codec = os.environ.get('PAYLOAD_CODEC', '').lower()
+    if codec == 'zstd' and not zstandard:
+        return 'gzip'
+    return codec if codec in ('zstd', 'gzip') else None
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=ZSTD_DICTIONARY, write_checksum=False, write_dict_id=False
+        ).compress(data)
+    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15, zdict=DICTIONARY)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data, marker):
+    if marker == 'zstd-1':
+        return zstandard.ZstdDecompressor(dict_data=ZSTD_DICTIONARY).decompress(data)
+    if marker == 'deflate-1':
+        decompressor = zlib.decompressobj(-15, zdict=DICTIONARY)
+        return decompressor.decompress(data) + decompressor.flush()
+    raise ValueError(f'Unknown payload codec: {marker}')
+
+
+def pack_item(item, codec=None):
+    """Item as it should be written: data fields compressed when a codec is set."""
+    codec = codec or configured_codec()
+    if not codec:
+        return item
+    fields = {name: value for name, value in item.items() if name not in PLAIN_ATTRIBUTES}
+    if not fields:
+        return item
+    data = dumps_bytes(native_numbers(fields))
+    payload = compress(data, codec)
+    if len(payload) + PACK_OVERHEAD_BYTES >= len(data):
+        return item
+    packed = {name: value for name, value in item.items() if name in PLAIN_ATTRIBUTES}
+    packed[PAYLOAD_ATTRIBUTE] = Binary(payload)
+    packed[CODEC_ATTRIBUTE] = CODEC_MARKERS[codec]
+    return packed
+
+
+def unpack_item(item):
+    """Item with its payload expanded into plain attributes, numbers as Decimal."""
+    if CODEC_ATTRIBUTE not in item:
+        return item
+    unpacked = dict(item)
+    payload = unpacked.pop(PAYLOAD_ATTRIBUTE)
+    marker = unpacked.pop(CODEC_ATTRIBUTE)
+    fields = decode_payload(getattr(payload, 'value', payload), marker)
+    # Attributes set by an UpdateItem after the item was packed are newer
+    return {**fields, **unpacked}
+
+
+def strip_packed_attributes(data):
+    """Client data without the attribute names reserved for packed items."""
+    if not any(name in data for name in PACKED_ATTRIBUTES):
+        return data
+    return {name: value for name, value in data.items() if name not in PACKED_ATTRIBUTES}
+
+
+def decode_payload(payload, marker, native=False):
+    """Decompress a payload; native=True gives int/float instead of Decimal."""
+    data = decompress(payload, marker)
+    if native:
+        return json.loads(data)
+    return json.loads(data, parse_float=Decimal, parse_int=Decimal)
+
+
+def merge_packed(table, key, values, now, expected_version=None, skip_if_hash=None, remove=()):
+    """Merge values into the item at key and write it packed.
+
+    Mirrors an UpdateItem that SETs values, REMOVEs the attributes in
+    remove, keeps created_at and adds 1 to the version. expected_version is an If-Match value (None, '*' or a
+    version). Returns (status, item) with status `created`, `updated`,
+    `unchanged` (the stored content_hash equals skip_if_hash) or
+    `conflict`; item is the unpacked item written, or the current one.
+    """
+    current = None
+    for attempt in range(MERGE_ATTEMPTS):
+        current = table.get_item(Key=key, ConsistentRead=True).get('Item')
+        current_version = current.get(VERSION_ATTRIBUTE) if current else None
+        if expected_version is not None and (
+                current is None or (expected_version != '*' and current_version != expected_version)):
+            return 'conflict', current and unpack_item(current)
+        if current and skip_if_hash and current.get('content_hash') == skip_if_hash:
+            return 'unchanged', unpack_item(current)
+
+        item = dict(unpack_item(current)) if current else {'created_at': now}
+        item.update((name, value) for name, value in values.items() if name not in ('created_at', VERSION_ATTRIBUTE))
+        item.update(key)
+        for name in remove:
+            item.pop(name, None)
+        item[VERSION_ATTRIBUTE] = (current_version or 0) + 1
+
+        # Only write over exactly the item that was read
+        put_kwargs = {'Item': pack_item(item)}
+        put_kwargs['ConditionExpression'], condition_values = unchanged_condition(current)
+        if condition_values:
+            put_kwargs['ExpressionAttributeValues'] = condition_values
+        try:
+            table.put_item(**put_kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            continue
+        return ('created' if current is None else 'updated'), item
+
+    return 'conflict', current and unpack_item(current)
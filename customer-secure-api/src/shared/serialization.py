@@ -0,0 +1,90 @@
+"""Response body serialization shared by the Lambda handlers.
+
+JSON uses orjson when it is importable and falls back to the standard
+library otherwise. Both produce compact UTF-8 JSON. Neither encoder
+knows Decimal (as returned by the DynamoDB resource API), so both still
+call encode_decimal once per Decimal. That callback is Decimal.__float__
+itself, a C method, which avoids the Python frame of a json.JSONEncoder
+subclass but not the per-value call. Readers that build items from raw
+AttributeValues (the data API with FAST_DESERIALIZE) produce int and
+float directly and skip it.
+
+MessagePack and CBOR are available when msgpack / cbor2 are installed;
+they encode Decimals as native integers or floats.
+"""
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+JSON_MEDIA_TYPE = 'application/json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+CBOR_MEDIA_TYPE = 'application/cbor'
+
+# Raises TypeError for anything that is not a Decimal
+encode_decimal = Decimal.__float__
+
+
+def dumps(obj):
+    """Serialize obj to a JSON str."""
+    if orjson:
+        return orjson.dumps(obj, default=encode_decimal).decode()
+    return json.dumps(obj, default=encode_decimal, separators=(',', ':'), ensure_ascii=False)
+
+
+def dumps_bytes(obj):
+    """Serialize obj to UTF-8 encoded JSON bytes."""
+    if orjson:
+        return orjson.dumps(obj, default=encode_decimal)
+    return dumps(obj).encode()
+
+
+def supported_media_types():
+    """Media types encode() can produce, in order of preference."""
+    media_types = [JSON_MEDIA_TYPE]
+    if msgpack:
+        media_types.append(MSGPACK_MEDIA_TYPE)
+    if cbor2:
+        media_types.append(CBOR_MEDIA_TYPE)
+    return media_types
+
+
+def encode(obj, media_type=JSON_MEDIA_TYPE):
+    """Serialize obj to bytes in the given media type."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(obj, default=decimal_to_number)
+    if media_type == CBOR_MEDIA_TYPE:
+        # cbor2 would write Decimals as tagged decimal fractions
+        return cbor2.dumps(native_numbers(obj))
+    return dumps_bytes(obj)
+
+
+def decimal_to_number(value):
+    if not isinstance(value, Decimal):
+        raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+    if value == value.to_integral_value():
+        return int(value)
+    return float(value)
+
+
+def native_numbers(obj):
+    if isinstance(obj, dict):
+        return {key: native_numbers(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [native_numbers(value) for value in obj]
+    if isinstance(obj, Decimal):
+        return decimal_to_number(obj)
+    return obj
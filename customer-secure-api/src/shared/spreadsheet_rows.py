@@ -0,0 +1,50 @@
+"""Mapping of order spreadsheet rows to upsert records.
+
+Shared by the XLSX utility and the S3 ingest function so both load a
+sheet identically: Customer becomes customer_id, SONum/SOLine the
+sortable data_id, and every other non-empty column is passed as text in
+`data` alongside SONum and SOLine. Writers then type the columns with the
+tenant's column schema (see column_types).
+"""
+from data_keys import encode_data_id
+
+REQUIRED_COLUMNS = ('Customer', 'SONum', 'SOLine')
+
+
+def missing_columns(columns):
+    return [column for column in REQUIRED_COLUMNS if column not in columns]
+
+
+def row_to_record(row):
+    """Build the upsert record for a {column: value} row, or None to skip it.
+
+    Empty cells must be passed as None (or an empty string).
+    """
+    if any(is_empty(row.get(column)) for column in REQUIRED_COLUMNS):
+        return None
+
+    data = {}
+    for column, value in row.items():
+        if column not in REQUIRED_COLUMNS and column and not is_empty(value):
+            data[column] = to_text(value)
+
+    # Add SONum and SOLine to data for reference
+    data['SONum'] = to_text(row['SONum'])
+    data['SOLine'] = to_text(row['SOLine'])
+
+    return {
+        'customer_id': to_text(row['Customer']),
+        'data_id': encode_data_id(row['SONum'], row['SOLine']),
+        'data': data
+    }
+
+
+def is_empty(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def to_text(value):
+    # Whole-number cells often come back as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
@@ -0,0 +1,39 @@
+"""Per-tenant write version counters.
+
+Every writer to the customer data table bumps the tenant's counter, and
+readers fold the current value into their cache keys, so any write
+invalidates that tenant's cached pages. Both calls are no-ops when
+TENANT_VERSIONS_TABLE is not configured.
+"""
+import os
+
+import boto3
+
+dynamodb = boto3.resource('dynamodb')
+
+
+def bump_tenant_version(customer_id):
+    """Atomically increment the tenant's version and return the new value."""
+    table_name = os.environ.get('TENANT_VERSIONS_TABLE')
+    if not table_name:
+        return None
+    response = dynamodb.Table(table_name).update_item(
+        Key={'customer_id': customer_id},
+        UpdateExpression='ADD version :one',
+        ExpressionAttributeValues={':one': 1},
+        ReturnValues='UPDATED_NEW'
+    )
+    return int(response['Attributes']['version'])
+
+
+def get_tenant_version(customer_id):
+    table_name = os.environ.get('TENANT_VERSIONS_TABLE')
+    if not table_name:
+        return None
+    # Strongly consistent so a write is visible to the very next read
+    item = dynamodb.Table(table_name).get_item(
+        Key={'customer_id': customer_id},
+        ProjectionExpression='version',
+        ConsistentRead=True
+    ).get('Item')
+    return int(item['version']) if item else 0
@@ -0,0 +1,54 @@
+"""In-process LRU cache with per-entry TTLs and an entry/byte budget.
+
+Lives for the lifetime of a warm Lambda container. Safe to share between
+the handler and background threads.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+    
+    def put(self, key, value, size, ttl):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, size, time.monotonic() + ttl)
+            self.total_bytes += size
+            # Evict least recently used entries until within budget
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+    
+    def pop(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self._remove(key)
+            value, size, expires = entry
+            return value if expires >= time.monotonic() else None
+    
+    def _remove(self, key):
+        value, size, expires = self.entries.pop(key)
+        self.total_bytes -= size
@@ -0,0 +1,40 @@
+import json
+from decimal import Decimal
+
+from bulk_upsert import bulk_upsert
+
+def lambda_handler(event, context):
+    """Drain queued upserts from PUT /admin/upsert?mode=async.
+
+    Each SQS batch (up to 10 messages) goes through bulk_upsert, which
+    coalesces messages for the same (customer_id, data_id) so only the
+    newest is written. Only the messages that failed or kept conflicting
+    with other writers are reported back, so SQS redelivers just those
+    and eventually moves poison messages to the dead-letter queue.
+    """
+    message_ids = []
+    records = []
+    failures = []
+
+    # Standard queues do not preserve order; the last sent upsert for a key wins
+    messages = sorted(event['Records'], key=lambda m: int(m.get('attributes', {}).get('SentTimestamp', 0)))
+    for message in messages:
+        try:
+            # DynamoDB rejects floats, so numbers are parsed straight to Decimal
+            records.append(json.loads(message['body'], parse_float=Decimal))
+            message_ids.append(message['messageId'])
+        except ValueError:
+            failures.append(message['messageId'])
+
+    try:
+        results = bulk_upsert(records)
+    except Exception as e:
+        print(json.dumps({'error': str(e), 'messages': len(message_ids)}))
+        failures.extend(message_ids)
+    else:
+        for message_id, result in zip(message_ids, results):
+            if result['status'] in ('error', 'conflict'):
+                print(json.dumps({'messageId': message_id, 'error': result['error']}))
+                failures.append(message_id)
+
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
@@ -37,9 +37,9 @@ curl -s -X GET "$API_URL/data" -H "Authorization: Bearer $TOKEN" -H "Content-Typ
 {"customer_id": "test-customer-1", "data": [{"customer_id": "test-customer-1", "value": 10.0, "data_id": "sample-data-1", "created_at": "2025-08-04T18:44:46Z", "name": "Sample Data Item 1"}], "count": 1}
 
 curl -s -X GET "$API_URL/data?limit=2" -H "Authorization: Bearer $TOKEN" -H "Content-Type: application/json" 
-{"customer_id": "test-customer-1", "data": [{"customer_id": "test-customer-1", "value": 10.0, "data_id": "sample-data-1", "created_at": "2025-08-04T18:44:46Z", "name": "Sample Data Item 1"}, {"customer_id": "test-customer-1", "value": 20.0, "data_id": "sample-data-2", "created_at": "2025-08-04T18:51:31Z", "name": "Sample Data Item 2"}], "count": 2, "nextToken": "eyJjdXN0b21lcl9pZCI6ICJ0ZXN0LWN1c3RvbWVyLTEiLCAiZGF0YV9pZCI6ICJzYW1wbGUtZGF0YS0yIn0="}
+{"customer_id": "test-customer-1", "data": [{"customer_id": "test-customer-1", "value": 10.0, "data_id": "sample-data-1", "created_at": "2025-08-04T18:44:46Z", "name": "Sample Data Item 1"}, {"customer_id": "test-customer-1", "value": 20.0, "data_id": "sample-data-2", "created_at": "2025-08-04T18:51:31Z", "name": "Sample Data Item 2"}], "count": 2, "nextToken": "AXNhbXBsZS1kYXRhLTKobC6SGhYsuHKhV-g"}
 
-export NEXT_PAGE_TOKEN="eyJjdXN0b21lcl9pZCI6ICJ0ZXN0LWN1c3RvbWVyLTEiLCAiZGF0YV9pZCI6ICJzYW1wbGUtZGF0YS0yIn0="
+export NEXT_PAGE_TOKEN="AXNhbXBsZS1kYXRhLTKobC6SGhYsuHKhV-g"
 
 curl -s -X GET "$API_URL/data?limit=3&nextToken=$NEXT_PAGE_TOKEN" -H "Authorization: Bearer $TOKEN" -H "Content-Type: application/json"
 {"customer_id": "test-customer-1", "data": [{"customer_id": "test-customer-1", "value": 30.0, "data_id": "sample-data-3", "created_at": "2025-08-04T18:52:05Z", "name": "Sample Data Item 3"}], "count": 1}
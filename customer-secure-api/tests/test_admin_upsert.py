@@ -0,0 +1,53 @@
+import json
+from decimal import Decimal
+
+from conftest import admin_event, create_table, load_handler
+
+
+def upsert(admin, data, data_id='d1', headers=None):
+    response = admin.lambda_handler(admin_event({'customer_id': 'c', 'data_id': data_id, 'data': data},
+                                                headers=headers), None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_single_upsert_accepts_fractional_numbers(data_table):
+    admin = load_handler('admin-data')
+
+    status, body = upsert(admin, {'qty': 1.5, 'price': 0.1})
+
+    assert status == 200
+    item = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']
+    assert item['qty'] == Decimal('1.5')
+    assert item['price'] == Decimal('0.1')
+
+
+def test_batch_and_single_upserts_store_numbers_alike(data_table):
+    admin = load_handler('admin-data')
+    upsert(admin, {'qty': 2.25}, data_id='single')
+    admin.lambda_handler(admin_event([{'customer_id': 'c', 'data_id': 'batch', 'data': {'qty': 2.25}}],
+                                     resource='/admin/upsert/batch'), None)
+
+    single = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'single'})['Item']
+    batch = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'batch'})['Item']
+    assert single['qty'] == batch['qty'] == Decimal('2.25')
+
+
+def test_schema_defaults_keep_stored_column_types(dynamodb, monkeypatch):
+    monkeypatch.setenv('COLUMN_SCHEMA_TABLE', 'column-schemas')
+    create_table(dynamodb, 'column-schemas')
+    admin = load_handler('admin-data')
+
+    def put_schema(body):
+        response = admin.lambda_handler(admin_event(body, resource='/admin/schema'), None)
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])['schema']['columns']
+
+    put_schema({'customer_id': 'c', 'columns': {'ItemCode': 'string', 'SOPrice': 'number'}})
+    columns = put_schema({
+        'customer_id': 'c',
+        'columns': {'SOPrice': 'string'},
+        'defaults': {'ItemCode': 'number', 'PlanAvailDate': 'date'}
+    })
+
+    assert columns == {'ItemCode': 'string', 'SOPrice': 'string', 'PlanAvailDate': 'date'}
+    assert put_schema({'customer_id': 'c', 'columns': {'Qty': 'number'}}) == {'Qty': 'number'}
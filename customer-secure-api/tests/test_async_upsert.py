@@ -0,0 +1,58 @@
+import json
+from decimal import Decimal
+
+import boto3
+import pytest
+
+from conftest import admin_event, load_handler
+
+
+@pytest.fixture
+def queue_url(dynamodb, monkeypatch):
+    url = boto3.client('sqs').create_queue(QueueName='upserts')['QueueUrl']
+    monkeypatch.setenv('UPSERT_QUEUE_URL', url)
+    return url
+
+
+def enqueue(admin, body, headers=None):
+    response = admin.lambda_handler(admin_event(body, headers=headers, query={'mode': 'async'}), None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def receive(queue_url):
+    messages = boto3.client('sqs').receive_message(
+        QueueUrl=queue_url, MaxNumberOfMessages=10, AttributeNames=['All']
+    )['Messages']
+    return [{'messageId': m['MessageId'], 'body': m['Body'], 'attributes': m['Attributes']} for m in messages]
+
+
+def test_queued_upserts_are_coalesced_by_the_consumer(data_table, queue_url):
+    admin = load_handler('admin-data')
+    consumer = load_handler('upsert-consumer')
+    for value in (1.5, 2.5, 3):
+        status, body = enqueue(admin, {'customer_id': 'c', 'data_id': 'd1', 'data': {'v': value}})
+        assert status == 202
+        assert body['status'] == 'queued'
+
+    messages = sorted(receive(queue_url), key=lambda m: json.loads(m['body'])['data']['v'])
+    # Delivered out of order; the last sent still wins
+    for sent, message in enumerate(messages):
+        message['attributes']['SentTimestamp'] = str(1700000000000 + sent)
+    messages.reverse()
+    result = consumer.lambda_handler({'Records': messages + [
+        {'messageId': 'bad', 'body': 'not json', 'attributes': {}}
+    ]}, None)
+
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'bad'}]}
+    item = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']
+    assert item['v'] == Decimal('3')
+    assert item['version'] == 1
+
+
+def test_invalid_async_requests_are_rejected_up_front(queue_url):
+    admin = load_handler('admin-data')
+
+    assert enqueue(admin, {'customer_id': 'c', 'data': {}})[0] == 400
+    assert enqueue(admin, {'customer_id': 'c', 'data_id': 'd1', 'data': {}}, headers={'If-Match': '"1"'})[0] == 400
+    assert enqueue(admin, {'customer_id': 'c', 'data_id': 'd1', 'data': {'blob': 'x' * 300 * 1024}})[0] == 413
+    assert 'Messages' not in boto3.client('sqs').receive_message(QueueUrl=queue_url)
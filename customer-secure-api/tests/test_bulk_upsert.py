@@ -0,0 +1,82 @@
+import bulk_upsert as bulk
+
+
+def record(data_id, **data):
+    return {'customer_id': 'c', 'data_id': data_id, 'data': data}
+
+
+def race_after_read(monkeypatch, data_table, rounds):
+    """Have another writer update item d1 right after each of the first reads."""
+    real_batch_get = bulk.batch_get
+    reads = []
+
+    def batch_get(table_name, keys, projection=None):
+        found = real_batch_get(table_name, keys, projection)
+        reads.append(keys)
+        if len(reads) <= rounds:
+            data_table.update_item(
+                Key={'customer_id': 'c', 'data_id': 'd1'},
+                UpdateExpression='SET tenant_note = :note ADD version :one',
+                ExpressionAttributeValues={':note': f'write {len(reads)}', ':one': 1}
+            )
+        return found
+
+    monkeypatch.setattr(bulk, 'batch_get', batch_get)
+    return reads
+
+
+def test_creates_updates_and_skips_unchanged(data_table):
+    assert [r['status'] for r in bulk.bulk_upsert([record('d1', qty='1'), record('d2', qty='2')])] == \
+        ['created', 'created']
+
+    results = bulk.bulk_upsert([record('d1', qty='1'), record('d2', qty='3'), record('d2', qty='4')])
+
+    assert [r['status'] for r in results] == ['unchanged', 'superseded', 'updated']
+    item = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd2'})['Item']
+    assert item['qty'] == '4'
+    assert item['version'] == 2
+
+
+def test_concurrent_write_is_merged_not_overwritten(data_table, monkeypatch):
+    bulk.bulk_upsert([record('d1', qty='1')])
+    reads = race_after_read(monkeypatch, data_table, rounds=1)
+
+    results = bulk.bulk_upsert([record('d1', qty='2')])
+
+    assert results[0]['status'] == 'updated'
+    assert len(reads) == 2
+    item = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']
+    assert item['qty'] == '2'
+    assert item['tenant_note'] == 'write 1'
+    assert item['version'] == 3
+
+
+def test_record_that_keeps_losing_is_reported_as_conflict(data_table, monkeypatch):
+    bulk.bulk_upsert([record('d1', qty='1'), record('d2', qty='1')])
+    race_after_read(monkeypatch, data_table, rounds=bulk.MERGE_ATTEMPTS)
+
+    results = bulk.bulk_upsert([record('d1', qty='2'), record('d2', qty='2')])
+
+    assert [r['status'] for r in results] == ['conflict', 'updated']
+    item = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']
+    assert item['qty'] == '1'
+    assert item['tenant_note'] == f'write {bulk.MERGE_ATTEMPTS}'
+
+
+def test_item_created_between_read_and_put_is_not_replaced(data_table, monkeypatch):
+    real_batch_get = bulk.batch_get
+
+    def batch_get(table_name, keys, projection=None):
+        found = real_batch_get(table_name, keys, projection)
+        if not found:
+            data_table.put_item(Item={'customer_id': 'c', 'data_id': 'd1', 'name': 'tenant', 'version': 1})
+        return found
+
+    monkeypatch.setattr(bulk, 'batch_get', batch_get)
+
+    results = bulk.bulk_upsert([record('d1', qty='1')])
+
+    assert results[0]['status'] == 'updated'
+    item = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']
+    assert item['name'] == 'tenant'
+    assert item['qty'] == '1'
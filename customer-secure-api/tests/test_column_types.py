@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from column_types import coerce, to_date, to_number
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2025-04-09', '2025-04-09'),
+    ('04/09/2025', '2025-04-09'),
+    ('2025-04-09 13:05:00', '2025-04-09T13:05:00'),
+    ('2025-04-09T13:05:00Z', '2025-04-09T13:05:00'),
+    ('2025-04-09T13:05:00.250Z', '2025-04-09T13:05:00'),
+    ('2025-04-09T13:05:00+02:00', '2025-04-09T11:05:00'),
+    ('2025-04-09T00:30:00.5+02:00', '2025-04-08T22:30:00'),
+    ('2025-04-09T13:05:00-05:00', '2025-04-09T18:05:00'),
+    (datetime(2025, 4, 9, 13, 5, tzinfo=timezone(timedelta(hours=2))), '2025-04-09T11:05:00'),
+    (datetime(2025, 4, 9), '2025-04-09'),
+])
+def test_dates_are_stored_as_utc_iso_strings(value, expected):
+    assert to_date('PlanAvailDate', value) == expected
+
+
+@pytest.mark.parametrize('value', ['soon', '2025-13-01', '31/31/2025'])
+def test_invalid_dates(value):
+    with pytest.raises(ValueError, match='PlanAvailDate: expected a date'):
+        to_date('PlanAvailDate', value)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1,200.0', Decimal('1200')),
+    ('122.320', Decimal('122.32')),
+    (3, Decimal('3')),
+])
+def test_numbers(value, expected):
+    assert to_number('SOPrice', value) == expected
+
+
+@pytest.mark.parametrize('value', ['abc', 'NaN', 'Infinity', True])
+def test_invalid_numbers(value):
+    with pytest.raises(ValueError, match='SOPrice: expected a number'):
+        to_number('SOPrice', value)
+
+
+def test_coerce_leaves_untyped_and_empty_values():
+    data = {'SOPrice': '2.50', 'PlanAvailDate': '', 'ItemDesc': 'Roll'}
+
+    assert coerce(data, {'SOPrice': 'number', 'PlanAvailDate': 'date'}) == {
+        'SOPrice': Decimal('2.5'),
+        'PlanAvailDate': '',
+        'ItemDesc': 'Roll'
+    }
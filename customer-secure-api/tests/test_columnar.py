@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import load_handler
+
+
+@pytest.fixture
+def columnar():
+    load_handler('api')
+    import columnar
+    return columnar
+
+
+def test_missing_and_null_values_round_trip(columnar):
+    items = [
+        {'customer_id': 'c', 'data_id': '0000104449#00001', 'SONum': '104449', 'note': None, 'qty': 1},
+        {'customer_id': 'c', 'data_id': '0000104449#00002', 'qty': 2},
+        {'customer_id': 'c', 'data_id': '0000104449#00003', 'SONum': '104449', 'note': None},
+        {'customer_id': 'c', 'data_id': '0000104449#00004', 'SONum': None}
+    ]
+
+    columns, rows, absent = columnar.encode_columnar(items)
+    decoded = columnar.decode_columnar({'columns': columns, 'rows': rows, 'absent': absent})
+
+    assert decoded == [{k: v for k, v in item.items() if k != 'customer_id'} for item in items]
+    assert columns[0] == 'data_id'
+    assert all(rows[row][column] is None for row, column in absent)
+
+
+def test_dense_page_has_no_absent_pairs(columnar):
+    items = [{'data_id': str(index), 'qty': index} for index in range(3)]
+
+    columns, rows, absent = columnar.encode_columnar(items)
+
+    assert absent == []
+    assert columnar.decode_columnar({'columns': columns, 'rows': rows}) == items
@@ -0,0 +1,49 @@
+import json
+
+from conftest import admin_event, load_handler
+
+
+def post(api, body, headers=None):
+    response = api.post_data('c', {'httpMethod': 'POST', 'headers': headers or {}, 'body': json.dumps(body)})
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_post_merges_and_versions(data_table):
+    api = load_handler('api')
+
+    assert post(api, {'data_id': 'p1', 'name': 'a', 'colour': 'red'})[0] == 201
+    status, body = post(api, {'data_id': 'p1', 'name': 'b'}, {'If-Match': '"1"'})
+
+    assert status == 200
+    assert body['item']['colour'] == 'red'
+    assert body['item']['version'] == 2
+    status, body = post(api, {'data_id': 'p1', 'name': 'c'}, {'If-Match': '"1"'})
+    assert status == 409
+    assert body['current_version'] == 2
+
+
+def test_post_invalidates_the_admin_content_hash(data_table):
+    admin = load_handler('admin-data')
+    api = load_handler('api')
+
+    def admin_upsert(data):
+        response = admin.lambda_handler(admin_event({'customer_id': 'c', 'data_id': 'd1', 'data': data}), None)
+        return json.loads(response['body'])
+
+    admin_upsert({'qty': '5'})
+    post(api, {'data_id': 'd1', 'name': 'n', 'qty': '7'})
+
+    assert admin_upsert({'qty': '5'})['status'] == 'updated'
+    assert data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']['qty'] == '5'
+    assert admin_upsert({'qty': '5'})['status'] == 'unchanged'
+
+
+def test_post_cannot_set_bookkeeping_attributes(data_table):
+    api = load_handler('api')
+
+    status, body = post(api, {'data_id': 'p1', 'name': 'a', 'version': 40, 'content_hash': 'forged'})
+
+    assert status == 201
+    item = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'p1'})['Item']
+    assert item['version'] == 1
+    assert 'content_hash' not in item
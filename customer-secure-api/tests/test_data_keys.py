@@ -0,0 +1,57 @@
+import pytest
+
+import data_keys
+from conftest import load_handler
+
+
+@pytest.fixture
+def compat(monkeypatch):
+    monkeypatch.setattr(data_keys, 'LEGACY_DATA_ID_COMPAT', True)
+
+
+def test_only_the_records_own_legacy_id_is_translated(compat):
+    order = {'SONum': 104449, 'SOLine': 1.0}
+
+    assert data_keys.canonical_data_id('104449-1', order) == '0000104449#00001'
+    assert data_keys.canonical_data_id(None, order) == '0000104449#00001'
+    for data_id in ('2025-08', 'invoice7-12', 'A1-B2', '104449-2'):
+        assert data_keys.canonical_data_id(data_id, order) == data_id
+        assert data_keys.canonical_data_id(data_id, {}) == data_id
+
+
+def test_unencodable_legacy_id_is_kept(compat):
+    assert data_keys.canonical_data_id('SO-104-1', {'SONum': 'SO-104', 'SOLine': 1}) == 'SO-104-1'
+
+
+def test_legacy_id_is_kept_without_compat():
+    assert data_keys.canonical_data_id('104449-1', {'SONum': 104449, 'SOLine': 1}) == '104449-1'
+
+
+@pytest.fixture
+def api(data_table, compat, monkeypatch):
+    module = load_handler('api')
+    monkeypatch.setattr(module, 'LEGACY_DATA_ID_COMPAT', True)
+    return module
+
+
+def filter_values(api, customer_id, **filters):
+    values = api.build_query(customer_id, filters)['ExpressionAttributeValues']
+    return {name: value for name, value in values.items() if name != ':customer_id'}
+
+
+def test_filters_are_translated_for_sales_order_tenants(api, data_table):
+    for line in (1, 2, 10):
+        data_table.put_item(Item={'customer_id': 'orders', 'data_id': data_keys.encode_data_id(104449, line)})
+
+    assert filter_values(api, 'orders', prefix='104449-') == {':prefix': '0000104449#'}
+    assert filter_values(api, 'orders', **{'from': '104449-1', 'to': '104449-9'}) == {
+        ':from': '0000104449#00001', ':to': '0000104449#00009'}
+
+
+def test_filters_are_kept_for_other_tenants(api, data_table):
+    for data_id in ('2025-08', 'invoice7-12', 'A1-B2'):
+        data_table.put_item(Item={'customer_id': 'own-ids', 'data_id': data_id})
+
+    assert filter_values(api, 'own-ids', prefix='2025-08') == {':prefix': '2025-08'}
+    assert filter_values(api, 'own-ids', prefix='invoice7-12') == {':prefix': 'invoice7-12'}
+    assert filter_values(api, 'own-ids', **{'from': 'A1-B2'}) == {':from': 'A1-B2'}
@@ -0,0 +1,104 @@
+import gzip
+import io
+import json
+from decimal import Decimal
+
+import boto3
+import pytest
+
+from conftest import load_handler
+
+
+@pytest.fixture
+def export_env(data_table, jobs_table, monkeypatch):
+    monkeypatch.setenv('TRANSFER_BUCKET', 'transfer')
+    monkeypatch.setenv('EXPORT_WORKER_FUNCTION', 'export-worker')
+    boto3.client('s3').create_bucket(Bucket='transfer')
+    with data_table.batch_writer() as batch:
+        for index in range(120):
+            batch.put_item(Item={'customer_id': 'c', 'data_id': f'{index:04d}', 'Plant': 'Denver',
+                                 'SOPrice': Decimal('12.5'), 'OrderStatus': 'Open'})
+        batch.put_item(Item={'customer_id': 'other', 'data_id': '0001', 'Plant': 'Gardena'})
+
+    api = load_handler('api')
+    worker = load_handler('export-worker')
+    invocations = []
+
+    class LambdaClient:
+        def invoke(self, FunctionName, InvocationType, Payload):
+            invocations.append(json.loads(Payload))
+
+    # Loaded from src/api/ along with the handler
+    import exports
+    monkeypatch.setattr(exports, 'lambda_client', LambdaClient())
+    return api, worker, invocations
+
+
+def request(api, method, resource, customer_id='c', body=None, export_id=None):
+    event = {
+        'requestContext': {'authorizer': {'customerId': customer_id}},
+        'httpMethod': method,
+        'resource': resource,
+        'headers': {},
+        'queryStringParameters': None,
+        'body': json.dumps(body) if body is not None else None
+    }
+    if export_id:
+        event['pathParameters'] = {'exportId': export_id}
+    response = api.lambda_handler(event, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def run_export(api, worker, invocations, export_format):
+    status, body = request(api, 'POST', '/data/exports', body={'format': export_format})
+    assert status == 202
+    assert invocations[-1] == {'job_id': body['export_id']}
+    worker.lambda_handler(invocations[-1], None)
+    return body['export_id']
+
+
+def exported_object(jobs_table, export_id):
+    job = jobs_table.get_item(Key={'job_id': export_id})['Item']
+    assert job['status'] == 'COMPLETED'
+    return job, boto3.client('s3').get_object(Bucket='transfer', Key=job['s3_key'])['Body'].read()
+
+
+def test_ndjson_export(export_env, jobs_table):
+    api, worker, invocations = export_env
+
+    export_id = run_export(api, worker, invocations, 'ndjson')
+
+    job, body = exported_object(jobs_table, export_id)
+    head = boto3.client('s3').head_object(Bucket='transfer', Key=job['s3_key'])
+    assert head['ContentType'] == 'application/gzip'
+    assert 'ContentEncoding' not in head
+    rows = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+    assert job['item_count'] == len(rows) == 120
+    assert {row['customer_id'] for row in rows} == {'c'}
+    assert rows[0]['SOPrice'] == 12.5
+
+    status, body = request(api, 'GET', '/data/exports/{exportId}', export_id=export_id)
+    assert status == 200
+    assert body['status'] == 'COMPLETED'
+    assert body['download_url'].startswith('https://')
+
+
+def test_parquet_export(export_env, jobs_table):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    api, worker, invocations = export_env
+
+    export_id = run_export(api, worker, invocations, 'parquet')
+
+    job, body = exported_object(jobs_table, export_id)
+    table = parquet.read_table(io.BytesIO(body))
+    assert table.num_rows == job['item_count'] == 120
+    assert {'data_id', 'Plant', 'SOPrice'} <= set(table.column_names)
+
+
+def test_exports_are_tenant_scoped(export_env):
+    api, worker, invocations = export_env
+    status, body = request(api, 'POST', '/data/exports', body={'format': 'ndjson'})
+
+    assert request(api, 'GET', '/data/exports/{exportId}', customer_id='other',
+                   export_id=body['export_id'])[0] == 404
+    assert request(api, 'POST', '/data/exports', body={'format': 'xml'})[0] == 400
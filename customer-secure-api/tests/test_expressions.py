@@ -0,0 +1,115 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from conftest import admin_event, load_handler
+from expressions import build_update, unchanged_condition, version_condition
+
+
+def test_every_name_goes_through_a_placeholder():
+    update = build_update({'name': 'a', 'status': 'open', 'data': 'x', 'Job Inv Qty': 3, 'Case/Roll Qty': 5})
+
+    names = update['ExpressionAttributeNames']
+    assert sorted(names.values()) == ['Case/Roll Qty', 'Job Inv Qty', 'data', 'name', 'status']
+    expression = update['UpdateExpression']
+    for name in names.values():
+        assert name not in expression
+    assert expression.startswith('SET ')
+
+
+def test_key_attributes_are_skipped():
+    update = build_update({'customer_id': 'c', 'data_id': 'd', 'name': 'a'})
+
+    assert list(update['ExpressionAttributeNames'].values()) == ['name']
+
+
+def test_nested_maps_are_passed_whole():
+    nested = {'a': {'b': [1, 2]}}
+    update = build_update({'nested': nested})
+
+    assert list(update['ExpressionAttributeValues'].values()) == [nested]
+
+
+def test_if_not_exists_and_increment():
+    update = build_update({'name': 'a', 'created_at': 'new'}, if_not_exists={'created_at': 'now'},
+                          increment={'version': 1})
+
+    assert update['UpdateExpression'] == 'SET #a0 = :v0, #a1 = if_not_exists(#a1, :v1) ADD #a2 :v2'
+    assert update['ExpressionAttributeNames'] == {'#a0': 'name', '#a1': 'created_at', '#a2': 'version'}
+    assert update['ExpressionAttributeValues'] == {':v0': 'a', ':v1': 'now', ':v2': 1}
+
+
+def test_nothing_to_update():
+    with pytest.raises(ValueError):
+        build_update({'customer_id': 'c', 'data_id': 'd'})
+
+
+def test_version_condition():
+    assert version_condition('*') == ('attribute_exists(customer_id)', {})
+    assert version_condition(3) == ('version = :expected_version', {':expected_version': 3})
+
+
+def test_update_round_trips_through_dynamodb(data_table):
+    key = {'customer_id': 'c', 'data_id': 'd1'}
+    values = {
+        'name': 'n',
+        'status': 'open',
+        'data': 'reserved',
+        'Job Inv Qty': Decimal('1.5'),
+        'Case/Roll Qty': 5,
+        'nested': {'x': {'y': [1, 2]}}
+    }
+    data_table.update_item(Key=key, **build_update(values, if_not_exists={'created_at': 't0'}))
+    data_table.update_item(Key=key, **build_update({'status': 'closed', 'nested': {'z': 1}},
+                                                   if_not_exists={'created_at': 't1'}))
+
+    item = data_table.get_item(Key=key)['Item']
+    assert item == {
+        **key,
+        'name': 'n',
+        'status': 'closed',
+        'data': 'reserved',
+        'Job Inv Qty': Decimal('1.5'),
+        'Case/Roll Qty': 5,
+        'nested': {'z': 1},
+        'created_at': 't0'
+    }
+
+
+def test_admin_upsert_merges_fields(data_table):
+    admin = load_handler('admin-data')
+    first = admin.lambda_handler(admin_event({
+        'customer_id': 'c',
+        'data_id': 'd1',
+        'data': {'name': 'n', 'status': 'open', 'Case/Roll Qty': 5}
+    }), None)
+    second = admin.lambda_handler(admin_event({
+        'customer_id': 'c',
+        'data_id': 'd1',
+        'data': {'status': 'closed', 'SOPrice': 2}
+    }), None)
+
+    assert first['statusCode'] == 200
+    assert second['statusCode'] == 200
+    item = json.loads(second['body'])['item']
+    assert item['status'] == 'closed'
+    assert item['name'] == 'n'
+    assert item['Case/Roll Qty'] == 5
+    assert item['SOPrice'] == 2
+    assert item['created_at'] == json.loads(first['body'])['item']['created_at']
+    assert item['version'] == 2
+
+
+def test_remove_clause():
+    update = build_update({'name': 'a'}, increment={'version': 1}, remove=('content_hash', 'name', 'data_id'))
+
+    assert update['UpdateExpression'] == 'SET #a0 = :v0 ADD #a1 :v1 REMOVE #r0'
+    assert update['ExpressionAttributeNames']['#r0'] == 'content_hash'
+
+
+def test_unchanged_condition():
+    assert unchanged_condition(None) == ('attribute_not_exists(customer_id)', {})
+    assert unchanged_condition({'customer_id': 'c'}) == (
+        'attribute_exists(customer_id) AND attribute_not_exists(version)', {})
+    assert unchanged_condition({'version': 4}) == ('version = :read_version', {':read_version': 4})
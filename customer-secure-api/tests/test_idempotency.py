@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import idempotency
+from conftest import admin_event, create_table, load_handler
+
+
+@pytest.fixture
+def admin(dynamodb, monkeypatch):
+    monkeypatch.setenv('IDEMPOTENCY_TABLE', 'idempotency')
+    create_table(dynamodb, 'idempotency', key='idempotency_key')
+    return load_handler('admin-data')
+
+
+def upsert_batch(admin, records, key='k1'):
+    event = admin_event(records, resource='/admin/upsert/batch', headers={'Idempotency-Key': key})
+    response = admin.lambda_handler(event, None)
+    return response['statusCode'], json.loads(response['body']), response['headers']
+
+
+def batch(size):
+    return [{'customer_id': 'c', 'data_id': f'd{index}', 'data': {'ItemDesc': f'item {index}'}}
+            for index in range(size)]
+
+
+def test_large_batch_response_is_replayed(admin, data_table, monkeypatch):
+    monkeypatch.setattr(idempotency, 'MAX_STORED_RESPONSE_BYTES', 16 * 1024)
+    records = batch(1000)
+
+    status, first, _ = upsert_batch(admin, records)
+    assert status == 200
+    assert len(json.dumps(first)) > idempotency.MAX_STORED_RESPONSE_BYTES
+
+    status, replayed, headers = upsert_batch(admin, records)
+    assert status == 200
+    assert headers['Idempotent-Replayed'] == 'true'
+    assert replayed == first
+    assert {result['status'] for result in replayed['results']} == {'created'}
+
+
+def test_unstorable_response_refuses_the_retry(admin, data_table, monkeypatch):
+    monkeypatch.setattr(idempotency, 'MAX_STORED_RESPONSE_BYTES', 64)
+    records = batch(3)
+
+    assert upsert_batch(admin, records)[0] == 200
+    data_table.delete_item(Key={'customer_id': 'c', 'data_id': 'd0'})
+
+    status, body, _ = upsert_batch(admin, records)
+    assert status == 409
+    assert body['response_digest']
+    assert 'Item' not in data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd0'})
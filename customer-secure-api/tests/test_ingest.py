@@ -0,0 +1,80 @@
+import json
+
+import boto3
+import pytest
+
+from conftest import load_handler
+
+
+@pytest.fixture
+def ingest(data_table):
+    boto3.client('s3').create_bucket(Bucket='transfer')
+    return load_handler('ingest')
+
+
+def upload(key, body):
+    boto3.client('s3').put_object(Bucket='transfer', Key=key, Body=body)
+    return {'Records': [{'s3': {'bucket': {'name': 'transfer'}, 'object': {'key': key.replace(' ', '+')}}}]}
+
+
+def manifest(key):
+    body = boto3.client('s3').get_object(Bucket='transfer', Key=key)['Body'].read()
+    return json.loads(body)
+
+
+def test_csv_import(ingest, data_table):
+    csv_body = (
+        '﻿Customer,SONum,SOLine,Job Inv Qty,SOPrice\n'
+        'Calyx Containers,104449,1,5,12.5\n'
+        'Acme,,2,1,1\n'
+        'Acme,SO7,3,,\n'
+        'Acme,x-y,1,,\n'
+        '\n'
+    )
+
+    ingest.lambda_handler(upload('imports/Calyx 20250804.csv', csv_body.encode()), None)
+
+    result = manifest('imports/Calyx 20250804.manifest.json')
+    assert result['status'] == 'COMPLETED'
+    assert result['rows'] == 4
+    assert result['skipped_rows'] == 1
+    assert result['counts'] == {'created': 2, 'error': 1}
+    assert result['errors'][0]['row'] == 5
+    item = data_table.get_item(Key={'customer_id': 'Calyx Containers', 'data_id': '0000104449#00001'})['Item']
+    assert item['Job Inv Qty'] == '5'
+    assert item['SONum'] == '104449'
+    assert data_table.get_item(Key={'customer_id': 'Acme', 'data_id': 'SO0000000007#00003'}).get('Item')
+
+
+def test_reimport_skips_unchanged_rows(ingest):
+    csv_body = b'Customer,SONum,SOLine,Unit\nAcme,1,1,EA\nAcme,1,2,EA\n'
+    ingest.lambda_handler(upload('imports/a.csv', csv_body), None)
+
+    ingest.lambda_handler(upload('imports/a.csv', csv_body.replace(b'1,2,EA', b'1,2,CS')), None)
+
+    assert manifest('imports/a.manifest.json')['counts'] == {'unchanged': 1, 'updated': 1}
+
+
+def test_xlsx_import(ingest, data_table, tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Customer', 'SONum', 'SOLine', 'Job Ord Qty'])
+    sheet.append(['Acme', 104449.0, 1, 5000])
+    path = tmp_path / 'orders.xlsx'
+    workbook.save(path)
+
+    ingest.lambda_handler(upload('imports/orders.xlsx', path.read_bytes()), None)
+
+    assert manifest('imports/orders.manifest.json')['counts'] == {'created': 1}
+    item = data_table.get_item(Key={'customer_id': 'Acme', 'data_id': '0000104449#00001'})['Item']
+    assert item['Job Ord Qty'] == '5000'
+    assert item['SONum'] == '104449'
+
+
+def test_missing_columns_fail_the_file(ingest):
+    ingest.lambda_handler(upload('imports/bad.csv', b'a,b\n1,2\n'), None)
+
+    result = manifest('imports/bad.manifest.json')
+    assert result['status'] == 'FAILED'
+    assert 'Missing required columns' in result['error']
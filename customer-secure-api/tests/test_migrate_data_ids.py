@@ -0,0 +1,118 @@
+import importlib.util
+import os
+
+import boto3
+import pytest
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+import payload_codec
+from conftest import ROOT
+
+
+@pytest.fixture
+def migrate(dynamodb, tmp_path):
+    spec = importlib.util.spec_from_file_location('migrate_data_ids',
+                                                  os.path.join(ROOT, 'utility', 'migrate-data-ids.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    class Args:
+        table = os.environ['CUSTOMER_DATA_TABLE']
+        segments = 2
+        dry_run = False
+        checkpoint = str(tmp_path / 'checkpoint.json')
+
+    def run():
+        checkpoint = {'segments': {}}
+        return [module.migrate_segment(Args, segment, checkpoint) for segment in range(Args.segments)]
+
+    module.run = run
+    return module
+
+
+def data_ids(data_table):
+    items = data_table.query(KeyConditionExpression=Key('customer_id').eq('c'))['Items']
+    return sorted(item['data_id'] for item in items)
+
+
+def test_migrates_plain_and_packed_items(data_table, migrate):
+    data_table.put_item(Item={'customer_id': 'c', 'data_id': '5-1', 'SONum': '5', 'SOLine': '1'})
+    packed = payload_codec.pack_item({
+        'customer_id': 'c', 'data_id': '6-2', 'SONum': '6', 'SOLine': '2',
+        'ItemDesc': 'AYR FL Kynd 3.5g bag White', 'CustItemRef': 'AYWL-FL-1913-KY30', 'OrderStatus': 'Complete'
+    }, 'gzip')
+    assert 'SONum' not in packed
+    data_table.put_item(Item=packed)
+    data_table.put_item(Item={'customer_id': 'c', 'data_id': 'SO-104-1', 'SONum': 'SO-104', 'SOLine': '1'})
+
+    states = migrate.run()
+
+    assert data_ids(data_table) == ['0000000005#00001', '0000000006#00002', 'SO-104-1']
+    assert sum(state.get('migrated', 0) for state in states) == 2
+    assert sum(state.get('skipped', 0) for state in states) == 1
+    moved = data_table.get_item(Key={'customer_id': 'c', 'data_id': '0000000006#00002'})['Item']
+    assert payload_codec.unpack_item(moved)['ItemDesc'] == 'AYR FL Kynd 3.5g bag White'
+
+
+def test_existing_canonical_copy_wins(data_table, migrate):
+    data_table.put_item(Item={'customer_id': 'c', 'data_id': '5-1', 'SONum': '5', 'SOLine': '1', 'old': True})
+    data_table.put_item(Item={'customer_id': 'c', 'data_id': '0000000005#00001', 'SONum': '5', 'SOLine': '1'})
+
+    migrate.run()
+
+    assert data_ids(data_table) == ['0000000005#00001']
+    assert 'old' not in data_table.get_item(Key={'customer_id': 'c', 'data_id': '0000000005#00001'})['Item']
+
+
+def test_cancelled_transaction_keeps_the_old_item(data_table, migrate, monkeypatch):
+    data_table.put_item(Item={'customer_id': 'c', 'data_id': '9-1', 'SONum': '9', 'SOLine': '1'})
+    attempts = []
+
+    class ConflictingClient:
+        def transact_write_items(self, **kwargs):
+            attempts.append(kwargs)
+            raise ClientError({
+                'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+                'CancellationReasons': [{'Code': 'TransactionConflict'}, {'Code': 'None'}]
+            }, 'TransactWriteItems')
+
+    monkeypatch.setattr(migrate.time, 'sleep', lambda seconds: None)
+
+    with pytest.raises(ClientError):
+        migrate.move_item(ConflictingClient(), boto3.resource('dynamodb'), data_table.name,
+                          {'customer_id': 'c', 'data_id': '9-1'}, '0000000009#00001')
+
+    assert len(attempts) == migrate.MOVE_ATTEMPTS
+    assert data_ids(data_table) == ['9-1']
+
+
+def test_ids_chosen_by_the_tenant_are_left_alone(data_table, migrate):
+    data_table.put_item(Item={'customer_id': 'c', 'data_id': 'invoice7-12', 'SONum': '7', 'SOLine': '12'})
+    data_table.put_item(Item={'customer_id': 'c', 'data_id': '2025-08', 'SONum': '2025', 'SOLine': '9'})
+
+    states = migrate.run()
+
+    assert data_ids(data_table) == ['2025-08', 'invoice7-12']
+    assert sum(state.get('migrated', 0) for state in states) == 0
+
+
+def test_write_after_the_scan_is_moved_not_lost(data_table, migrate):
+    scanned = {'customer_id': 'c', 'data_id': '5-1', 'SONum': '5', 'SOLine': '1', 'qty': 1, 'version': 1}
+    data_table.put_item(Item=dict(scanned, qty=2, version=2))
+    resource = boto3.resource('dynamodb')
+
+    assert migrate.move_item(boto3.client('dynamodb'), resource, data_table.name, scanned, '0000000005#00001')
+
+    assert data_ids(data_table) == ['0000000005#00001']
+    moved = data_table.get_item(Key={'customer_id': 'c', 'data_id': '0000000005#00001'})['Item']
+    assert moved['qty'] == 2
+
+
+def test_item_deleted_after_the_scan_is_skipped(data_table, migrate):
+    scanned = {'customer_id': 'c', 'data_id': '5-1', 'SONum': '5', 'SOLine': '1', 'version': 1}
+    resource = boto3.resource('dynamodb')
+
+    assert not migrate.move_item(boto3.client('dynamodb'), resource, data_table.name, scanned, '0000000005#00001')
+
+    assert data_ids(data_table) == []
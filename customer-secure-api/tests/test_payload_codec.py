@@ -0,0 +1,108 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import payload_codec
+from conftest import admin_event, load_handler
+
+CODECS = ['gzip'] + (['zstd'] if payload_codec.zstandard else [])
+
+# One order line as the importer stores it
+ROW = {
+    'Plant': 'Denver', 'JobCode': '104000', 'JobLine': '1', 'CustPO': 'PO5012', 'ItemGroup': '900-PCH',
+    'ItemCode': '104572', 'ItemDesc': 'AYR FL Kynd 3.5g bag White', 'PlanAvailDate': '2025-11-24',
+    'CustItemRef': 'AYWL-FL-1913-KY30', 'Job Inv Qty': Decimal('0'), 'Job Ord Qty': Decimal('5000'),
+    'Job Recd Qty': Decimal('204'), 'SO Shipped Qty': Decimal('189'), 'Job Outst Qty': Decimal('4796'),
+    'Unit': 'EA', 'SOPrice': Decimal('367.41'), 'OrderStatus': 'Complete', 'Case/Roll Qty': Decimal('2000'),
+    'SONum': '104000', 'SOLine': '1'
+}
+
+
+def get_data(api):
+    response = api.lambda_handler({
+        'requestContext': {'authorizer': {'customerId': 'c'}},
+        'httpMethod': 'GET',
+        'resource': '/data',
+        'queryStringParameters': None,
+        'headers': {},
+        'body': None
+    }, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+@pytest.fixture(params=['false', 'true'], ids=['resource', 'fast-path'])
+def api(request, monkeypatch):
+    monkeypatch.setenv('FAST_DESERIALIZE', request.param)
+    return load_handler('api')
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_pack_round_trip(codec):
+    item = dict(ROW, customer_id='c', data_id='d1', version=Decimal(1), content_hash='0' * 32)
+
+    packed = payload_codec.pack_item(item, codec)
+
+    assert payload_codec.CODEC_ATTRIBUTE in packed
+    assert 'SONum' not in packed
+    assert payload_codec.unpack_item(packed) == item
+
+
+def test_items_that_would_grow_stay_plain():
+    item = {'customer_id': 'c', 'data_id': 'd', 'n': 'x'}
+
+    assert payload_codec.pack_item(item, 'gzip') is item
+
+
+def test_client_payload_field_is_not_mistaken_for_packed_data(data_table, api, monkeypatch):
+    monkeypatch.delenv('PAYLOAD_CODEC', raising=False)
+
+    response = api.post_data('c', {'httpMethod': 'POST', 'headers': {}, 'body': json.dumps(
+        {'name': 'a', 'data_id': 'x1', 'payload': 'hello', 'payload_codec': 'mine', '_payload': 'forged'}
+    )})
+
+    assert response['statusCode'] == 201
+    status, body = get_data(api)
+    assert status == 200
+    item = body['data'][0]
+    assert item['payload'] == 'hello'
+    assert item['payload_codec'] == 'mine'
+    assert '_payload' not in item
+
+
+@pytest.mark.parametrize('codec', CODECS)
+def test_packed_writes_read_back_plain(data_table, api, monkeypatch, codec):
+    monkeypatch.setenv('PAYLOAD_CODEC', codec)
+    admin = load_handler('admin-data')
+    row = {**json.loads(json.dumps(ROW, default=str)), '_payload_codec': 'forged'}
+
+    response = admin.lambda_handler(admin_event({'customer_id': 'c', 'data_id': 'd1', 'data': row}), None)
+
+    assert response['statusCode'] == 200
+    stored = data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']
+    assert stored[payload_codec.CODEC_ATTRIBUTE] != 'forged'
+    assert 'SONum' not in stored
+    status, body = get_data(api)
+    assert status == 200
+    item = body['data'][0]
+    assert item['SONum'] == row['SONum']
+    assert '_payload_codec' not in item
+
+
+def test_post_over_packed_item_drops_content_hash(data_table, api, monkeypatch):
+    monkeypatch.setenv('PAYLOAD_CODEC', 'gzip')
+    admin = load_handler('admin-data')
+    row = json.loads(json.dumps(ROW, default=str))
+
+    def admin_upsert():
+        response = admin.lambda_handler(admin_event({'customer_id': 'c', 'data_id': 'd1', 'data': row}), None)
+        return json.loads(response['body'])['status']
+
+    admin_upsert()
+    api.post_data('c', {'httpMethod': 'POST', 'headers': {}, 'body': json.dumps(
+        {'name': 'n', 'data_id': 'd1', 'Unit': 'EA'}
+    )})
+
+    assert 'content_hash' not in data_table.get_item(Key={'customer_id': 'c', 'data_id': 'd1'})['Item']
+    assert admin_upsert() == 'updated'
+    assert admin_upsert() == 'unchanged'
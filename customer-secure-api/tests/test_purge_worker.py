@@ -0,0 +1,97 @@
+import pytest
+from boto3.dynamodb.conditions import Key
+
+from conftest import load_handler
+
+
+class Context:
+    function_name = 'purge-worker'
+
+    def get_remaining_time_in_millis(self):
+        return 15 * 60 * 1000
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    module = load_handler('purge-worker')
+    monkeypatch.setattr(module, 'PURGE_PAGE_SIZE', 10)
+    return module
+
+
+def start_job(data_table, jobs_table, count=30):
+    with data_table.batch_writer() as batch:
+        for index in range(count):
+            batch.put_item(Item={'customer_id': 'c', 'data_id': f'{index:03d}'})
+    jobs_table.put_item(Item={'job_id': 'j1', 'job_type': 'purge', 'customer_id': 'c', 'status': 'PENDING',
+                              'deleted_count': 0})
+
+
+def throttle_page(worker, monkeypatch, page):
+    """Make the deletes of one page (1-based) come back unprocessed."""
+    real_batch_delete = worker.batch_delete
+    calls = []
+
+    def batch_delete(table_name, keys):
+        calls.append(keys)
+        if len(calls) == page:
+            return keys
+        return real_batch_delete(table_name, keys)
+
+    monkeypatch.setattr(worker, 'batch_delete', batch_delete)
+
+
+def remaining(data_table):
+    return data_table.query(KeyConditionExpression=Key('customer_id').eq('c'))['Count']
+
+
+def test_failed_page_keeps_checkpoint_and_retry_resumes(data_table, jobs_table, worker, monkeypatch):
+    start_job(data_table, jobs_table)
+    throttle_page(worker, monkeypatch, page=2)
+
+    with pytest.raises(RuntimeError):
+        worker.lambda_handler({'job_id': 'j1'}, Context())
+
+    job = jobs_table.get_item(Key={'job_id': 'j1'})['Item']
+    assert job['status'] == 'RETRYING'
+    assert job['failures'] == 1
+    assert job['deleted_count'] == 10
+    assert job['last_key'] == {'customer_id': 'c', 'data_id': '009'}
+
+    # Lambda's async retry
+    worker.lambda_handler({'job_id': 'j1'}, Context())
+
+    job = jobs_table.get_item(Key={'job_id': 'j1'})['Item']
+    assert job['status'] == 'COMPLETED'
+    assert job['deleted_count'] == 30
+    assert 'failures' not in job
+    assert remaining(data_table) == 0
+
+
+def test_job_fails_after_retries_and_can_still_be_resumed(data_table, jobs_table, worker, monkeypatch):
+    start_job(data_table, jobs_table)
+    real_batch_delete = worker.batch_delete
+    monkeypatch.setattr(worker, 'batch_delete', lambda table_name, keys: keys)
+
+    for attempt in range(1 + worker.MAX_RETRY_ATTEMPTS):
+        with pytest.raises(RuntimeError):
+            worker.lambda_handler({'job_id': 'j1'}, Context())
+
+    job = jobs_table.get_item(Key={'job_id': 'j1'})['Item']
+    assert job['status'] == 'FAILED'
+    assert job['failures'] == 3
+
+    monkeypatch.setattr(worker, 'batch_delete', real_batch_delete)
+    worker.lambda_handler({'job_id': 'j1'}, Context())
+
+    assert jobs_table.get_item(Key={'job_id': 'j1'})['Item']['status'] == 'COMPLETED'
+    assert remaining(data_table) == 0
+
+
+def test_completed_job_is_not_rerun(data_table, jobs_table, worker):
+    start_job(data_table, jobs_table, count=5)
+    jobs_table.update_item(Key={'job_id': 'j1'}, UpdateExpression='SET #s = :s',
+                           ExpressionAttributeNames={'#s': 'status'}, ExpressionAttributeValues={':s': 'COMPLETED'})
+
+    worker.lambda_handler({'job_id': 'j1'}, Context())
+
+    assert remaining(data_table) == 5
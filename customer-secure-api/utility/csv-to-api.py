@@ -3,9 +3,74 @@ import json
 import requests
 import sys
 import os
+from collections import Counter
 import pandas as pd
 
-def process_xlsx_via_upsert(xlsx_file, api_url, admin_api_key):
+# Share the row mapping with the API
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'shared'))
+from spreadsheet_rows import REQUIRED_COLUMNS, missing_columns, row_to_record
+from column_types import COLUMN_TYPES, to_date
+
+# Rows per PUT /admin/upsert/batch request
+BATCH_SIZE = 500
+
+def send_batch(api_url, headers, batch, counts):
+    """Upsert one batch of rows, tallying the outcome of each in counts"""
+    response = requests.put(f"{api_url}/admin/upsert/batch",
+                            headers=headers, json=batch)
+    if response.status_code != 200:
+        print(f"⚠️  Failed to upsert batch of {len(batch)} rows: {response.text}")
+        counts['error'] += len(batch)
+        return
+    
+    for result in response.json()['results']:
+        counts[result['status']] += 1
+        if result['status'] in ('error', 'conflict'):
+            print(f"⚠️  Failed to upsert {batch[result['index']]['data_id']}: {result['error']}")
+
+def infer_columns(df):
+    """Guess each column's type from its pandas dtype"""
+    columns = {}
+    for column, dtype in df.dtypes.items():
+        if column in REQUIRED_COLUMNS:
+            continue
+        if pd.api.types.is_bool_dtype(dtype):
+            columns[column] = 'string'
+        elif pd.api.types.is_numeric_dtype(dtype):
+            columns[column] = 'number'
+        elif pd.api.types.is_datetime64_any_dtype(dtype) or is_date_column(df[column]):
+            columns[column] = 'date'
+        else:
+            columns[column] = 'string'
+    return columns
+
+def is_date_column(series):
+    """True if every non-empty value in a text column reads as a date"""
+    values = series.dropna()
+    if values.empty:
+        return False
+    try:
+        for value in values:
+            to_date(series.name, value)
+    except ValueError:
+        return False
+    return True
+
+def send_schema(api_url, headers, customer_id, inferred, overrides):
+    """Seed the column types used to coerce this customer's rows.
+
+    Inferred types only fill in columns the stored schema lacks, so types
+    set through PUT /admin/schema are kept; overrides replace both.
+    """
+    response = requests.put(f"{api_url}/admin/schema", headers=headers,
+                            json={'customer_id': customer_id, 'columns': overrides, 'defaults': inferred})
+    if response.status_code != 200:
+        print(f"❌ Failed to save column schema for {customer_id}: {response.text}")
+        return False
+    print(f"📄 Column types for {customer_id}: {response.json()['schema']['columns']}")
+    return True
+
+def process_xlsx_via_upsert(xlsx_file, api_url, admin_api_key, overrides=None):
     """Process XLSX file and upsert data via admin endpoint"""
     
     headers = {
@@ -18,64 +83,64 @@ def process_xlsx_via_upsert(xlsx_file, api_url, admin_api_key):
     print(f"📄 Processing {len(df)} records from {xlsx_file}")
     print(f"📄 Columns: {df.columns}")
     # Check for required columns
-    required_cols = ['Customer', 'SONum', 'SOLine']
-    missing_cols = [col for col in required_cols if col not in df.columns]
+    missing_cols = missing_columns(df.columns)
     if missing_cols:
         print(f"❌ Missing required columns: {missing_cols}")
         return
     
-    processed = 0
-    for _, row in df.iterrows():
-        if pd.isna(row['Customer']) or pd.isna(row['SONum']) or pd.isna(row['SOLine']):
+    # Numbers and dates are stored typed, so they can be filtered and sorted
+    inferred = infer_columns(df)
+    for customer_id in df['Customer'].dropna().astype(str).unique():
+        if not send_schema(api_url, headers, customer_id, inferred, overrides or {}):
+            return
+    
+    counts = Counter()
+    batch = []
+    # Row 1 of the sheet is the header
+    for row_number, row in enumerate(df.to_dict('records'), start=2):
+        # Same Customer/SONum/SOLine mapping as the S3 ingest function
+        try:
+            record = row_to_record({col: None if pd.isna(value) else value for col, value in row.items()})
+        except ValueError as e:
+            # e.g. a SONum that cannot be encoded as a data_id
+            print(f"⚠️  Row {row_number}: {e}")
+            counts['error'] += 1
+            continue
+        if record is None:
             continue
-            
-        # Create customer_id from Customer column
-        customer_id = str(row['Customer'])
-        
-        # Create data_id from SONum + SOLine
-        data_id = f"{row['SONum']}-{row['SOLine']}"
-        
-        # Create data object with all columns except Customer, SONum, SOLine
-        data = {}
-        for col in df.columns:
-            if col not in ['Customer', 'SONum', 'SOLine']:
-                value = row[col]
-                if not pd.isna(value):
-                    data[col] = str(value)
-        
-        # Add SONum and SOLine to data for reference
-        data['SONum'] = str(row['SONum'])
-        data['SOLine'] = str(row['SOLine'])
         
-        # API payload for upsert
-        payload = {
-            "customer_id": customer_id,
-            "data_id": data_id,
-            "data": data
-        }
-            
-        # PUT to admin upsert endpoint
-        response = requests.put(f"{api_url}/admin/upsert", 
-                               headers=headers, json=payload)
-        if response.status_code == 200:
-            processed += 1
-        else:
-            print(f"⚠️  Failed to upsert row {processed + 1}: {response.text}")
+        batch.append(record)
+        if len(batch) >= BATCH_SIZE:
+            send_batch(api_url, headers, batch, counts)
+            batch = []
     
-    print(f"✅ Successfully processed {processed} records")
+    if batch:
+        send_batch(api_url, headers, batch, counts)
+    
+    print(f"✅ Created {counts['created']}, updated {counts['updated']}, unchanged {counts['unchanged']}, "
+          f"failed {counts['error'] + counts['conflict']}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 4:
-        print("Usage: python3 csv-to-api.py <xlsx-file> <api-url> <admin-api-key>")
-        print("Example: python3 csv-to-api.py Calyx20250804.xlsx https://api.example.com/dev your-admin-api-key")
+        print("Usage: python3 csv-to-api.py <xlsx-file> <api-url> <admin-api-key> [Column=type ...]")
+        print("Example: python3 csv-to-api.py Calyx20250804.xlsx https://api.example.com/dev your-admin-api-key ItemCode=string")
         sys.exit(1)
     
     xlsx_file = sys.argv[1]
     api_url = sys.argv[2]
     admin_api_key = sys.argv[3]
     
+    # Override inferred column types, e.g. ItemCode=string
+    overrides = {}
+    for arg in sys.argv[4:]:
+        column, _, column_type = arg.rpartition('=')
+        if not column or column_type not in COLUMN_TYPES:
+            print(f"❌ Invalid column type '{arg}'; use Column=type with type one of {', '.join(COLUMN_TYPES)}")
+            sys.exit(1)
+        overrides[column] = column_type
+    
     if not os.path.exists(xlsx_file):
         print(f"❌ XLSX file '{xlsx_file}' not found")
         sys.exit(1)
     
-    process_xlsx_via_upsert(xlsx_file, api_url, admin_api_key)
\ No newline at end of file
+    process_xlsx_via_upsert(xlsx_file, api_url, admin_api_key, overrides)
\ No newline at end of file
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Rewrite legacy "SONum-SOLine" data_ids to the canonical sortable encoding.
+
+Scans the customer data table in parallel segments. Each item whose
+data_id is exactly its own f"{SONum}-{SOLine}" is copied to its
+canonical key and the old item deleted in one transaction; ids a tenant
+chose itself are left alone. The delete is conditional on the version
+scanned, so an item written to in the meantime is read again and
+retried rather than lost. Progress is checkpointed per segment, so an
+interrupted run picks up where it left off when started again with the
+same checkpoint file.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'shared'))
+from data_keys import is_legacy_data_id, sales_order_data_id
+from expressions import unchanged_condition
+from payload_codec import unpack_item
+
+# Transactions cancelled by a conflicting write or throttling are retried
+MOVE_ATTEMPTS = 5
+
+# Guards the shared checkpoint: every segment's state lives in it
+checkpoint_lock = threading.Lock()
+
+
+def migrate_segment(args, segment, checkpoint):
+    # Sessions are not thread-safe, so each segment gets its own
+    session = boto3.session.Session()
+    client = session.client('dynamodb')
+    resource = session.resource('dynamodb')
+    table = resource.Table(args.table)
+    with checkpoint_lock:
+        state = checkpoint['segments'].setdefault(str(segment), {})
+    if state.get('done'):
+        return state
+
+    scan_kwargs = {'Segment': segment, 'TotalSegments': args.segments}
+    while True:
+        if state.get('last_key'):
+            scan_kwargs['ExclusiveStartKey'] = state['last_key']
+        response = table.scan(**scan_kwargs)
+
+        for item in response['Items']:
+            new_id = legacy_item_id(item)
+            if new_id is None:
+                continue
+            if not new_id or (not args.dry_run and not move_item(client, resource, args.table, item, new_id)):
+                with checkpoint_lock:
+                    state['skipped'] = state.get('skipped', 0) + 1
+                continue
+            with checkpoint_lock:
+                state['migrated'] = state.get('migrated', 0) + 1
+                state.setdefault('customers', [])
+                if item['customer_id'] not in state['customers']:
+                    state['customers'].append(item['customer_id'])
+
+        with checkpoint_lock:
+            state['last_key'] = response.get('LastEvaluatedKey')
+            state['done'] = not state['last_key']
+        if not args.dry_run:
+            save_checkpoint(args.checkpoint, checkpoint)
+        if state['done']:
+            return state
+
+
+def legacy_item_id(item):
+    """The canonical id to move item to, None to leave it, '' when unencodable."""
+    # SONum/SOLine sit inside the payload of compressed items
+    data = unpack_item(item)
+    if not is_legacy_data_id(item['data_id'], data):
+        return None
+    try:
+        return sales_order_data_id(data)
+    except ValueError:
+        return ''
+
+
+def move_item(client, resource, table_name, item, new_id):
+    """Move item to new_id; False if it was deleted or renamed meanwhile."""
+    serializer = TypeSerializer()
+    table = resource.Table(table_name)
+    key = {'customer_id': item['customer_id'], 'data_id': item['data_id']}
+    old_key = {name: serializer.serialize(value) for name, value in key.items()}
+    for attempt in range(MOVE_ATTEMPTS):
+        new_item = {name: serializer.serialize(value) for name, value in dict(item, data_id=new_id).items()}
+        # Only delete the old item as scanned, so a write in between is never dropped
+        condition, values = unchanged_condition(item)
+        delete = {'TableName': table_name, 'Key': old_key, 'ConditionExpression': condition}
+        if values:
+            delete['ExpressionAttributeValues'] = {name: serializer.serialize(v) for name, v in values.items()}
+        try:
+            client.transact_write_items(TransactItems=[
+                {'Put': {
+                    'TableName': table_name,
+                    'Item': new_item,
+                    'ConditionExpression': 'attribute_not_exists(data_id)'
+                }},
+                {'Delete': delete}
+            ])
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons') or [{}, {}]]
+            if reasons[1:2] == ['ConditionalCheckFailed']:
+                # Written to since the scan: move what is there now
+                item = table.get_item(Key=key, ConsistentRead=True).get('Item')
+                if item is None or legacy_item_id(item) != new_id:
+                    return False
+                continue
+            if reasons[0] == 'ConditionalCheckFailed':
+                # Already written under the new key by an updated writer; that copy wins
+                try:
+                    table.delete_item(Key=key, ConditionExpression=condition, **(
+                        {'ExpressionAttributeValues': values} if values else {}))
+                    return True
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                item = table.get_item(Key=key, ConsistentRead=True).get('Item')
+                if item is None or legacy_item_id(item) != new_id:
+                    return False
+                continue
+            # Cancelled for another reason (TransactionConflict, throttling): nothing was written
+            if attempt == MOVE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.1 * 2 ** attempt)
+    return False
+
+
+def save_checkpoint(path, checkpoint):
+    with checkpoint_lock:
+        # Serialized under the lock so no segment changes its state mid-dump
+        snapshot = json.dumps(checkpoint, default=str)
+        with open(path + '.tmp', 'w') as f:
+            f.write(snapshot)
+        os.replace(path + '.tmp', path)
+
+
+def bump_tenant_versions(table_name, customers):
+    # Invalidate the data API's cached pages for every tenant touched
+    table = boto3.resource('dynamodb').Table(table_name)
+    for customer_id in customers:
+        table.update_item(
+            Key={'customer_id': customer_id},
+            UpdateExpression='ADD version :one',
+            ExpressionAttributeValues={':one': 1}
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('table', help='Customer data table name')
+    parser.add_argument('--tenant-versions-table', help='Tenant versions table to bump after migrating')
+    parser.add_argument('--segments', type=int, default=8, help='Parallel scan segments (default 8)')
+    parser.add_argument('--checkpoint', default='migrate-data-ids.checkpoint.json')
+    parser.add_argument('--dry-run', action='store_true', help='Count items to migrate without writing')
+    args = parser.parse_args()
+
+    checkpoint = {'segments': {}}
+    if os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('total_segments') not in (None, args.segments):
+            print(f"❌ Checkpoint was written with --segments {checkpoint['total_segments']}")
+            sys.exit(1)
+        print(f"🔁 Resuming from {args.checkpoint}")
+    checkpoint['total_segments'] = args.segments
+
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        states = list(executor.map(
+            lambda segment: migrate_segment(args, segment, checkpoint),
+            range(args.segments)
+        ))
+
+    migrated = sum(state.get('migrated', 0) for state in states)
+    skipped = sum(state.get('skipped', 0) for state in states)
+    customers = sorted({c for state in states for c in state.get('customers', [])})
+
+    if args.tenant_versions_table and customers and not args.dry_run:
+        bump_tenant_versions(args.tenant_versions_table, customers)
+
+    verb = 'Would migrate' if args.dry_run else 'Migrated'
+    print(f"✅ {verb} {migrated} items for {len(customers)} customers ({skipped} skipped)")